@@ -0,0 +1,290 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# Read the metadata of generated books directly from the file
+# instead of parsing the output of ebook-meta
+import struct
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from posixpath import dirname, join as posix_join
+from typing import BinaryIO, Dict, List, Optional
+from xml.etree import ElementTree
+
+OPF_NS = "http://www.idpf.org/2007/opf"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+CONTAINER_NS = "urn:oasis:names:tc:opendocument:xmlns:container"
+
+# EXTH record types
+EXTH_DESCRIPTION = 103
+EXTH_PUBLISHING_DATE = 106
+EXTH_COVER_OFFSET = 201
+EXTH_UPDATED_TITLE = 503
+NULL_INDEX = 0xFFFFFFFF
+
+
+@dataclass
+class BookMeta:
+    """Metadata of a generated book"""
+
+    title: str = ""
+    pubdate: Optional[datetime] = None  # in UTC
+    comments: List[str] = field(default_factory=list)  # non-empty comment lines
+    has_cover: bool = False
+
+    @property
+    def articles(self) -> List[str]:
+        # calibre news comments are formatted as:
+        # "Articles in this issue:", <article titles>..., <description>
+        return self.comments[1:-1]
+
+
+def _parse_pubdate(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if not value:
+        return None
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _comment_lines(comments: str) -> List[str]:
+    return [c.strip() for c in comments.split("\n") if c.strip()]
+
+
+def read_opf(opf: bytes) -> BookMeta:
+    """
+    Read metadata from an OPF document
+
+    :param opf:
+    :return:
+    """
+    root = ElementTree.fromstring(opf)
+    metadata = root.find(f"{{{OPF_NS}}}metadata")
+    if metadata is None:
+        return BookMeta()
+
+    def dc_text(tag: str) -> str:
+        ele = metadata.find(f"{{{DC_NS}}}{tag}")  # type: ignore[union-attr]
+        return (ele.text or "").strip() if ele is not None else ""
+
+    has_cover = any(
+        m.get("name") == "cover" and m.get("content")
+        for m in metadata.iter(f"{{{OPF_NS}}}meta")
+    ) or any(
+        "cover-image" in (item.get("properties") or "").split()
+        for item in root.iter(f"{{{OPF_NS}}}item")
+    )
+    return BookMeta(
+        title=dc_text("title"),
+        pubdate=_parse_pubdate(dc_text("date")),
+        comments=_comment_lines(dc_text("description")),
+        has_cover=has_cover,
+    )
+
+
+def _epub_opf_path(epub: zipfile.ZipFile) -> str:
+    container = ElementTree.fromstring(epub.read("META-INF/container.xml"))
+    rootfile = container.find(f".//{{{CONTAINER_NS}}}rootfile")
+    if rootfile is None or not rootfile.get("full-path"):
+        raise ValueError(f"No OPF found in {epub.filename}")
+    return rootfile.get("full-path", "")
+
+
+def read_epub_meta(file_path: Path) -> BookMeta:
+    """
+    Read metadata from the OPF inside an EPUB
+
+    :param file_path:
+    :return:
+    """
+    with zipfile.ZipFile(file_path) as epub:
+        opf_path = _epub_opf_path(epub)
+        book_meta = read_opf(epub.read(opf_path))
+        if not book_meta.has_cover:
+            # older calibre epubs only reference the cover in the guide
+            opf_root = ElementTree.fromstring(epub.read(opf_path))
+            for reference in opf_root.iter(f"{{{OPF_NS}}}reference"):
+                href = reference.get("href")
+                if reference.get("type") == "cover" and href:
+                    cover_path = posix_join(dirname(opf_path), href.split("#")[0])
+                    book_meta.has_cover = cover_path in epub.namelist()
+                    break
+        return book_meta
+
+
+def _read_exth(record0: bytes) -> Dict[int, List[bytes]]:
+    """
+    Read EXTH records from the first record of a MOBI
+
+    :param record0:
+    :return:
+    """
+    exth: Dict[int, List[bytes]] = {}
+    if record0[16:20] != b"MOBI":
+        raise ValueError("Not a MOBI file")
+    mobi_header_len, exth_flags = struct.unpack_from(">I", record0, 20)[0], 0
+    if len(record0) >= 132:
+        exth_flags = struct.unpack_from(">I", record0, 128)[0]
+    if not exth_flags & 0x40:
+        return exth
+    exth_start = 16 + mobi_header_len
+    if record0[exth_start : exth_start + 4] != b"EXTH":
+        return exth
+    record_count = struct.unpack_from(">I", record0, exth_start + 8)[0]
+    pos = exth_start + 12
+    for _ in range(record_count):
+        record_type, record_len = struct.unpack_from(">II", record0, pos)
+        exth.setdefault(record_type, []).append(record0[pos + 8 : pos + record_len])
+        pos += record_len
+    return exth
+
+
+def _read_record_offsets(f: BinaryIO, file_path: Path) -> List[int]:
+    palmdb_header = f.read(78)
+    if len(palmdb_header) < 78:
+        raise ValueError(f"Not a MOBI file: {file_path}")
+    record_count = struct.unpack_from(">H", palmdb_header, 76)[0]
+    record_offsets = [
+        struct.unpack_from(">I", f.read(8))[0] for _ in range(record_count)
+    ]
+    if not record_offsets:
+        raise ValueError(f"Not a MOBI file: {file_path}")
+    return record_offsets
+
+
+def _read_record(f: BinaryIO, record_offsets: List[int], index: int) -> bytes:
+    f.seek(record_offsets[index])
+    if index + 1 < len(record_offsets):
+        return f.read(record_offsets[index + 1] - record_offsets[index])
+    return f.read()
+
+
+def read_mobi_meta(file_path: Path) -> BookMeta:
+    """
+    Read metadata from the EXTH header of a MOBI
+
+    :param file_path:
+    :return:
+    """
+    with file_path.open("rb") as f:
+        record0 = _read_record(f, _read_record_offsets(f, file_path), 0)
+
+    encoding = "utf-8"
+    if struct.unpack_from(">I", record0, 28)[0] == 1252:
+        encoding = "cp1252"
+    exth = _read_exth(record0)
+
+    def exth_text(record_type: int) -> str:
+        values = exth.get(record_type)
+        return values[0].decode(encoding, "replace") if values else ""
+
+    title = exth_text(EXTH_UPDATED_TITLE)
+    if not title:
+        full_name_offset, full_name_len = struct.unpack_from(">II", record0, 84)
+        title = record0[full_name_offset : full_name_offset + full_name_len].decode(
+            encoding, "replace"
+        )
+    has_cover = False
+    if exth.get(EXTH_COVER_OFFSET):
+        has_cover = struct.unpack(">I", exth[EXTH_COVER_OFFSET][0][:4])[0] != NULL_INDEX
+    return BookMeta(
+        title=title.strip(),
+        pubdate=_parse_pubdate(exth_text(EXTH_PUBLISHING_DATE)),
+        comments=_comment_lines(exth_text(EXTH_DESCRIPTION)),
+        has_cover=has_cover,
+    )
+
+
+def read_epub_cover(file_path: Path) -> Optional[bytes]:
+    """
+    Get the cover image from an EPUB
+
+    :param file_path:
+    :return: None if there is no cover image
+    """
+    with zipfile.ZipFile(file_path) as epub:
+        opf_path = _epub_opf_path(epub)
+        opf_root = ElementTree.fromstring(epub.read(opf_path))
+        cover_ids = [
+            m.get("content")
+            for m in opf_root.iter(f"{{{OPF_NS}}}meta")
+            if m.get("name") == "cover"
+        ]
+        for item in opf_root.iter(f"{{{OPF_NS}}}item"):
+            href = item.get("href")
+            if not href or not (item.get("media-type") or "").startswith("image/"):
+                continue
+            if item.get("id") in cover_ids or "cover-image" in (
+                item.get("properties") or ""
+            ).split(" "):
+                return epub.read(posix_join(dirname(opf_path), href))
+    return None
+
+
+def read_mobi_cover(file_path: Path) -> Optional[bytes]:
+    """
+    Get the cover image from a MOBI
+
+    :param file_path:
+    :return: None if there is no cover image
+    """
+    with file_path.open("rb") as f:
+        record_offsets = _read_record_offsets(f, file_path)
+        record0 = _read_record(f, record_offsets, 0)
+        exth = _read_exth(record0)
+        if not exth.get(EXTH_COVER_OFFSET):
+            return None
+        cover_offset = struct.unpack(">I", exth[EXTH_COVER_OFFSET][0][:4])[0]
+        first_image_index = struct.unpack_from(">I", record0, 108)[0]
+        if NULL_INDEX in (cover_offset, first_image_index):
+            return None
+        cover_index = first_image_index + cover_offset
+        if cover_index >= len(record_offsets):
+            return None
+        return _read_record(f, record_offsets, cover_index)
+
+
+def read_book_cover(file_path: Path) -> Optional[bytes]:
+    """
+    Get a book's cover image directly from the file
+
+    :param file_path:
+    :return: None if the format is not supported or there is no cover
+    """
+    readers = {
+        ".epub": read_epub_cover,
+        ".mobi": read_mobi_cover,
+        ".azw3": read_mobi_cover,
+    }
+    reader = readers.get(file_path.suffix.lower())
+    if not reader:
+        return None
+    return reader(file_path)
+
+
+def read_book_meta(file_path: Path) -> Optional[BookMeta]:
+    """
+    Read a book's metadata directly from the file
+
+    :param file_path:
+    :return: None if the format is not supported
+    """
+    readers = {
+        ".epub": read_epub_meta,
+        ".mobi": read_mobi_meta,
+        ".azw3": read_mobi_meta,
+    }
+    reader = readers.get(file_path.suffix.lower())
+    if not reader:
+        return None
+    return reader(file_path)
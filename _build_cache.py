@@ -0,0 +1,142 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# A content-addressed cache of build outputs (converted books, cover stamped books)
+# so that work is not redone when the inputs have not changed.
+# Keys include the hash of the source book, and a freshly fetched book never
+# hashes the same as the last one (calibre embeds timestamps and a new uuid),
+# so entries are only hit when the source book was restored from the published
+# copy or from the local publish folder, i.e. for recipes that were not fetched.
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+# entries not used for this long are removed
+max_entry_age = 7 * 24 * 60 * 60
+# least recently used entries are removed beyond this total size
+max_cache_size = 2 * 1024 * 1024 * 1024
+
+
+def file_hash(file_paths: Iterable[Path]) -> str:
+    """
+    sha256 of the contents of the files
+
+    :param file_paths:
+    :return:
+    """
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+        with file_path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """
+    A build cache stored in a local folder. An entry's mtime is updated
+    when it is used so that pruning removes the least recently used entries.
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """
+        Make a cache key from the inputs of a build step. Only hits if every
+        part is unchanged, so a key that includes the hash of a freshly
+        fetched book will not match an earlier run.
+
+        :param parts: json serialisable inputs
+        :return:
+        """
+        return hashlib.sha256(
+            json.dumps(parts, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.folder.joinpath(key[:2], key)
+
+    @staticmethod
+    def _copy(src: Path, dest: Path) -> None:
+        # copy to a temp file first so that a partial copy is never seen
+        temp_dest = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copyfile(src, temp_dest)
+            os.replace(temp_dest, dest)
+        finally:
+            temp_dest.unlink(missing_ok=True)
+
+    def restore(self, key: str, dest: Path) -> bool:
+        """
+        Restore a cached build output
+
+        :param key:
+        :param dest:
+        :return: True if restored
+        """
+        entry_path = self._entry_path(key)
+        if not entry_path.exists():
+            return False
+        try:
+            self._copy(entry_path, dest)
+            os.utime(entry_path)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key: str, src: Path) -> None:
+        """
+        Save a build output
+
+        :param key:
+        :param src:
+        :return:
+        """
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        self._copy(src, entry_path)
+
+    def prune(
+        self, max_age: float = max_entry_age, max_size: int = max_cache_size
+    ) -> None:
+        """
+        Remove entries that have not been used recently, then the least
+        recently used entries until the cache fits in max_size. Entries
+        are not removed just for being unused in this run because a run
+        may only build some of the recipes.
+
+        :param max_age: seconds
+        :param max_size: bytes
+        :return:
+        """
+        if not self.folder.exists():
+            return
+        cutoff = time.time() - max_age
+        entries = []
+        for entry_path in self.folder.glob("*/*"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime < cutoff:
+                entry_path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+        for entry_folder in self.folder.iterdir():
+            if entry_folder.is_dir() and not any(entry_folder.iterdir()):
+                entry_folder.rmdir()
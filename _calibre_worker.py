@@ -0,0 +1,189 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# A long-lived calibre process that runs ebook-convert/ebook-meta jobs
+# in-process so that calibre's startup cost is only paid once.
+#
+# The worker is started with `calibre-debug -e _calibre_worker.py` and
+# reads one json request per line from stdin:
+#   {"cmd": "ebook-convert", "args": ["in.mobi", "out.epub", ...]}
+# and writes one json response per line to stdout:
+#   {"exit_code": 0, "output": "..."}
+# Anything printed by calibre while running a job is captured in "output".
+
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+
+class CalibreWorkerError(Exception):
+    """The calibre worker could not be started or exited unexpectedly."""
+
+
+def is_available() -> bool:
+    return bool(shutil.which("calibre-debug"))
+
+
+class CalibreWorker:
+    """Client for a single calibre worker process"""
+
+    def __init__(self, max_jobs: int = 50):
+        """
+        :param max_jobs: Restart the worker after this many jobs to keep memory use in check
+        """
+        self.max_jobs = max_jobs
+        self.jobs_run = 0
+        self.proc: Optional[subprocess.Popen] = None
+        self.responses: queue.Queue = queue.Queue()
+
+    @staticmethod
+    def _read_responses(proc: subprocess.Popen, responses: queue.Queue) -> None:
+        for line in proc.stdout:  # type: ignore[union-attr]
+            try:
+                responses.put(json.loads(line))
+            except ValueError:
+                # not a response, e.g. something printed by calibre-debug itself
+                continue
+        # worker has exited
+        responses.put(None)
+
+    def _start(self) -> None:
+        try:
+            self.proc = subprocess.Popen(
+                ["calibre-debug", "-e", str(Path(__file__).absolute())],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                encoding="utf-8",
+            )
+        except OSError as err:
+            raise CalibreWorkerError(f"Unable to start calibre worker: {err}") from err
+        self.jobs_run = 0
+        self.responses = queue.Queue()
+        threading.Thread(
+            target=self._read_responses, args=(self.proc, self.responses), daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        if not self.proc:
+            return
+        try:
+            self.proc.stdin.close()  # type: ignore[union-attr]
+            self.proc.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+
+    def run(self, cmd: List[str], timeout: Optional[float] = None) -> Tuple[int, str]:
+        """
+        Run an ebook-convert/ebook-meta command in the worker
+
+        :param cmd: Command as it would be passed to subprocess
+        :param timeout: Raises subprocess.TimeoutExpired if exceeded
+        :return: Tuple of (exit code, output)
+        """
+        if (
+            (not self.proc)
+            or self.proc.poll() is not None
+            or self.jobs_run >= self.max_jobs
+        ):
+            self.stop()
+            self._start()
+        try:
+            self.proc.stdin.write(  # type: ignore[union-attr]
+                json.dumps({"cmd": cmd[0], "args": cmd[1:]}) + "\n"
+            )
+            self.proc.stdin.flush()  # type: ignore[union-attr]
+        except OSError as err:
+            self.stop()
+            raise CalibreWorkerError(f"Unable to send job to worker: {err}") from err
+
+        try:
+            response = self.responses.get(timeout=timeout)
+        except queue.Empty:
+            # kill the worker, a new one will be started for the next job
+            self.stop()
+            raise subprocess.TimeoutExpired(cmd, timeout)  # type: ignore[arg-type]
+        if response is None:
+            self.stop()
+            raise CalibreWorkerError("calibre worker exited unexpectedly")
+        self.jobs_run += 1
+        return response["exit_code"], response["output"]
+
+
+class CalibreWorkerPool:
+    """A fixed size pool of calibre workers"""
+
+    def __init__(self, size: int):
+        self.all_workers = [CalibreWorker() for _ in range(max(size, 1))]
+        self.workers: queue.Queue = queue.Queue()
+        for worker in self.all_workers:
+            self.workers.put(worker)
+
+    @contextmanager
+    def worker(self) -> Iterator[CalibreWorker]:
+        worker = self.workers.get()
+        try:
+            yield worker
+        finally:
+            self.workers.put(worker)
+
+    def stop(self) -> None:
+        for worker in self.all_workers:
+            worker.stop()
+
+
+def _serve() -> None:
+    # calibre's modules are only available when run with calibre-debug
+    from calibre.ebooks.conversion.cli import main as ebook_convert
+    from calibre.ebooks.metadata.cli import main as ebook_meta
+
+    entry_points = {"ebook-convert": ebook_convert, "ebook-meta": ebook_meta}
+
+    # keep the original stdout for responses, anything else printed goes to the job output
+    response_out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    for line in sys.stdin:
+        request = json.loads(line)
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as job_output:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            saved_stdout_fd, saved_stderr_fd = os.dup(1), os.dup(2)
+            os.dup2(job_output.fileno(), 1)
+            os.dup2(job_output.fileno(), 2)
+            try:
+                exit_code = entry_points[request["cmd"]](
+                    [request["cmd"]] + request["args"]
+                )
+            except SystemExit as err:
+                exit_code = err.code if isinstance(err.code, int) else 1
+            except Exception:  # noqa, pylint: disable=broad-except
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved_stdout_fd, 1)
+                os.dup2(saved_stderr_fd, 2)
+                os.close(saved_stdout_fd)
+                os.close(saved_stderr_fd)
+            job_output.seek(0)
+            response_out.write(
+                json.dumps({"exit_code": exit_code or 0, "output": job_output.read()})
+                + "\n"
+            )
+            response_out.flush()
+
+
+if __name__ == "__main__":
+    _serve()
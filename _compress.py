@@ -0,0 +1,110 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# Writes precompressed .gz/.br siblings of the text assets in the publish folder
+# so that a static host or CDN can serve them without compressing on the fly.
+# Run as the last step before deploying, after the html has been minified
+# and the intermediate files have been removed:
+#   python3 _compress.py public
+import argparse
+import gzip
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__file__)
+ch = logging.StreamHandler(sys.stdout)
+ch.setLevel(logging.INFO)
+logger.addHandler(ch)
+logger.setLevel(logging.INFO)
+
+compressible_extensions = [".html", ".json", ".xml", ".xsl", ".css", ".js", ".svg"]
+# not worth compressing anything smaller
+min_compress_size = 1024
+manifest_filename = "compressed.json"
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    # mtime=0 so that unchanged files compress to the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_file(file_path: Path) -> Optional[Dict]:
+    """
+    Write the compressed variants of a file
+
+    :param file_path:
+    :return: Manifest entry, or None if the file was not compressed
+    """
+    data = file_path.read_bytes()
+    if len(data) < min_compress_size:
+        return None
+    encodings = {"gzip": ".gz"}
+    if brotli:
+        encodings["br"] = ".br"
+    entry: Dict = {"size": len(data), "encodings": {}}
+    for encoding, suffix in encodings.items():
+        compressed = _compress(data, encoding)
+        compressed_file_path = file_path.with_name(file_path.name + suffix)
+        if len(compressed) >= len(data):
+            compressed_file_path.unlink(missing_ok=True)
+            continue
+        compressed_file_path.write_bytes(compressed)
+        entry["encodings"][encoding] = {
+            "file": compressed_file_path.name,
+            "size": len(compressed),
+        }
+    return entry if entry["encodings"] else None
+
+
+def compress_folder(folder: Path) -> Dict[str, Dict]:
+    """
+    Compress the text assets in a folder and write a manifest of the encodings
+
+    :param folder:
+    :return: Manifest
+    """
+    file_paths = sorted(
+        f
+        for f in folder.iterdir()
+        if f.is_file()
+        and f.suffix in compressible_extensions
+        and f.name != manifest_filename
+    )
+    with ThreadPoolExecutor() as executor:
+        entries = executor.map(compress_file, file_paths)
+    manifest = {
+        file_path.name: entry for file_path, entry in zip(file_paths, entries) if entry
+    }
+    with folder.joinpath(manifest_filename).open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=0)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", type=str, help="Folder to compress")
+    args = parser.parse_args()
+
+    if not brotli:
+        logger.warning("brotli is not installed, only gzip variants are written")
+    for file_name, manifest_entry in compress_folder(Path(args.folder)).items():
+        logger.info(
+            f'{file_name}: {manifest_entry["size"]} -> '
+            + ", ".join(
+                f'{encoding} {e["size"]}'
+                for encoding, e in manifest_entry["encodings"].items()
+            )
+        )
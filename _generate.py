@@ -9,25 +9,44 @@ import logging
 import os
 import re
 import shutil
+import struct
 import subprocess
 import sys
+import tempfile
 import time
+import zipfile
 from collections import namedtuple
+from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
 from functools import cmp_to_key
+from io import BytesIO
 from math import ceil
 from pathlib import Path
+from statistics import median
 from timeit import default_timer as timer
-from typing import Dict, List, Optional
+from typing import IO, Dict, List, Optional, Set, Tuple
 from urllib.parse import urlencode, urljoin
-from xml.dom import minidom
+from xml.etree import ElementTree
 
 import humanize  # type: ignore
 import requests  # type: ignore
 from bleach import linkify
 
-from _opds import extension_contenttype_map, init_feed, simple_tag
-from _recipe_utils import Recipe, is_windows, sort_category
+from _book_meta import BookMeta, read_book_cover, read_book_meta, read_opf
+from _build_cache import BuildCache, file_hash
+from _calibre_worker import CalibreWorkerError, CalibreWorkerPool
+from _calibre_worker import is_available as is_calibre_worker_available
+from _job_log import (
+    RecipeHistory,
+    RecipeRunStats,
+    load_job_log,
+    outcome_from_status,
+    save_job_log,
+)
+from _opds import FeedWriter, Tag, extension_contenttype_map, simple_tag
+from _output_index import OutputIndex
+from _recipe_utils import Recipe, default_recipe_timeout, is_windows, sort_category
 from _recipes import (
     categories_sort as default_categories_sort,
     recipes as default_recipes,
@@ -36,7 +55,8 @@ from _recipes_custom import (
     categories_sort as custom_categories_sort,
     recipes as custom_recipes,
 )
-from _utils import generate_cover, slugify
+from _trace import Tracer
+from _utils import generate_cover, save_cover_and_thumbnail, slugify
 
 logger = logging.getLogger(__file__)
 ch = logging.StreamHandler(sys.stdout)
@@ -46,17 +66,51 @@ logger.setLevel(logging.INFO)
 
 publish_folder = Path("public")
 meta_folder = Path("meta")
+# used by recipes that enable BasicNewsrackRecipe.http_cache_ttl, one folder per recipe
+http_cache_folder = Path("cache", "http")
+http_cache_max_age = 24 * 60 * 60
+# converted and cover stamped books, kept out of meta/ because that is uploaded every run
+build_cache_folder = Path("cache", "build")
 job_log_filename = "job_log.json"
+logo_cache_folder_name = "logo_cache"
+trace_filename = "trace.json"
 catalog_path = "catalog.xml"
 index_json_filename = "index.json"
+published_index_filename = "published_index.json"
 lunr_docs_json_filename = "lunr_docs.json"
 default_retry_wait_interval = 2
+# seconds, for ebook-meta calls to read or update a book's metadata
+ebook_meta_timeout = 2 * 60
 
 RecipeOutput = namedtuple(
     "RecipeOutput",
     ["recipe", "title", "file", "rename_to", "published_dt", "description", "articles"],
 )
 
+# outputs is None when the recipe was skipped
+RecipeRunResult = namedtuple(
+    "RecipeRunResult", ["recipe", "outputs", "index", "last_run", "summary", "stats"]
+)
+
+# state shared by all recipes in a run
+RunContext = namedtuple(
+    "RunContext",
+    [
+        "publish_site",
+        "cached",
+        "cache_sess",
+        "accounts_info",
+        "regenerate_recipes_slugs",
+        "verbose_mode",
+        "today",
+        "calibre_workers",
+        "build_cache",
+        "tracer",
+        "outputs",
+        "article_store_folder",
+    ],
+)
+
 # sort categories for display
 # Ignoring mypy error below because of https://github.com/python/mypy/issues/9372
 sort_category_key = cmp_to_key(  # type: ignore[misc]
@@ -96,23 +150,71 @@ def _get_env_accounts_info() -> Dict:
 
 # fetch index.json from published site
 def _fetch_cache(site, cache_sess: requests.Session) -> Dict:
+    """
+    Fetch the published index.json, revalidating the copy kept in the meta folder
+    from the previous run. The local copy is used if the site is unreachable.
+
+    :param site:
+    :param cache_sess:
+    :return:
+    """
+    local_cache_path = meta_folder.joinpath(published_index_filename)
+    local_cache: Dict = {}
+    if local_cache_path.exists():
+        try:
+            with local_cache_path.open("r", encoding="utf-8") as f:
+                local_cache = json.load(f)
+        except (OSError, ValueError) as err:
+            logger.warning(f"Unable to load {local_cache_path}: {err}")
+
+    headers = {}
+    if local_cache.get("index"):
+        if local_cache.get("etag"):
+            headers["If-None-Match"] = local_cache["etag"]
+        if local_cache.get("last_modified"):
+            headers["If-Modified-Since"] = local_cache["last_modified"]
+
     retry_attempts = 1
     timeout = 15
     for attempt in range(1 + retry_attempts):
-        res = cache_sess.get(urljoin(site, index_json_filename), timeout=timeout)
         try:
+            res = cache_sess.get(
+                urljoin(site, index_json_filename), headers=headers, timeout=timeout
+            )
+            if res.status_code == 304:
+                logger.debug(f"{index_json_filename} not modified")
+                return local_cache["index"]
             res.raise_for_status()
-            return res.json()
+            cached = res.json()
         except Exception as err:  # noqa, pylint: disable=broad-except
             if attempt < retry_attempts:
                 logger.warning(
-                    f"{err.__class__.__name__} downloading {index_json_filename}"
+                    f"{err.__class__.__name__} downloading {index_json_filename}. "
                     f"Retrying after {default_retry_wait_interval}s..."
                 )
                 timeout += 15
                 time.sleep(default_retry_wait_interval)
                 continue
             logger.exception(f"{err.__class__.__name__} fetching {index_json_filename}")
+            if local_cache.get("index"):
+                logger.warning(f"Using saved copy of {index_json_filename}")
+            return local_cache.get("index", {})
+
+        try:
+            meta_folder.mkdir(parents=True, exist_ok=True)
+            with local_cache_path.open("w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "etag": res.headers.get("ETag", ""),
+                        "last_modified": res.headers.get("Last-Modified", ""),
+                        "index": cached,
+                    },
+                    f,
+                    indent=0,
+                )
+        except OSError as err:
+            logger.warning(f"Unable to save {local_cache_path}: {err}")
+        return cached
     return {}
 
 
@@ -130,154 +232,107 @@ def _write_opds(generated_output: Dict, recipe_covers: Dict, publish_site: str)
     Generate minimal OPDS
 
     :param generated_output:
+    :param recipe_covers: Covers extracted in this run
+    :param publish_site:
     :return:
     """
-    main_doc = minidom.Document()
-    main_feed = init_feed(main_doc, publish_site, "newsrack", "News Rack")
+    with publish_folder.joinpath(catalog_path).open("wb") as main_f:
+        main_feed = FeedWriter(main_f, publish_site, "newsrack", "News Rack")
 
-    for category, publications in sorted(
-        generated_output.items(), key=sort_category_key
-    ):
-        cat_doc = minidom.Document()
-        cat_feed = init_feed(
-            cat_doc, publish_site, "newsrack", f"News Rack - {category.title()}"
-        )
-
-        generated_items = [(k, v) for k, v in publications.items() if v]
-        for recipe_name, books in sorted(
-            generated_items, key=lambda item: item[1][0].published_dt, reverse=True
+        for category, publications in sorted(
+            generated_output.items(), key=sort_category_key
         ):
-            for doc, feed in [(main_doc, main_feed), (cat_doc, cat_feed)]:
-                entry = doc.createElement("entry")
-                entry.appendChild(
-                    simple_tag(
-                        doc, "id", books[0].recipe.slug if books else recipe_name
-                    )
-                )
-                entry.appendChild(
-                    simple_tag(
-                        doc,
-                        "title",
-                        f"{books[0].title or recipe_name}",
-                    )
-                )
-                entry.appendChild(
-                    simple_tag(
-                        doc,
-                        "summary",
-                        (
-                            f"{books[0].title or recipe_name} published at "
-                            f'{books[0].published_dt:{"%Y-%m-%d %I:%M%p %Z" if is_windows else "%Y-%m-%d %-I:%M%p %Z"}}'
-                        ),
-                    )
-                )
-                entry.appendChild(
-                    simple_tag(
-                        doc,
-                        "content",
-                        f"{books[0].description or recipe_name}",
-                        attributes={"type": "text/html"},
-                    )
-                )
-                entry.appendChild(
-                    simple_tag(
-                        doc,
-                        "updated",
-                        f"{books[0].published_dt:%Y-%m-%dT%H:%M:%SZ}",
-                    )
+            opds_xml_path = publish_folder.joinpath(f"{slugify(category, True)}.xml")
+            with opds_xml_path.open("wb") as cat_f:
+                cat_feed = FeedWriter(
+                    cat_f, publish_site, "newsrack", f"News Rack - {category.title()}"
                 )
-                entry.appendChild(
-                    simple_tag(
-                        doc,
-                        "category",
-                        attributes={"label": category.title()},
-                    )
-                )
-                author_tag = simple_tag(doc, "author")
-                author_tag.appendChild(simple_tag(doc, "name", category.title()))
-                entry.appendChild(author_tag)
-
-                covers = recipe_covers.get(books[0].recipe.slug)
-                if covers:
-                    cover_file_name = covers["cover"]
-                    cover_file_path = publish_folder.joinpath(cover_file_name)
-                    cover_thumbnail_file_name = covers["thumbnail"]
-                    cover_thumbnail_file_path = publish_folder.joinpath(
-                        cover_thumbnail_file_name
-                    )
-                    if cover_file_path.exists():
-                        entry.appendChild(
-                            simple_tag(
-                                doc,
-                                "link",
-                                attributes={
-                                    "rel": "http://opds-spec.org/image",
-                                    "type": "image/jpeg",
-                                    "href": cover_file_name,
-                                },
-                            )
-                        )
-                    if cover_thumbnail_file_path.exists():
-                        entry.appendChild(
-                            simple_tag(
-                                doc,
-                                "link",
-                                attributes={
-                                    "rel": "http://opds-spec.org/image/thumbnail",
-                                    "type": "image/jpeg",
-                                    "href": cover_thumbnail_file_name,
-                                },
-                            )
-                        )
-
-                for book in books:
-                    book_ext = Path(book.file).suffix
-                    link_type = (
-                        extension_contenttype_map.get(book_ext)
-                        or "application/octet-stream"
-                    )
-                    entry.appendChild(
-                        simple_tag(
-                            doc,
-                            "link",
-                            attributes={
-                                "rel": "http://opds-spec.org/acquisition",
-                                "type": link_type,
-                                "href": f"{Path(book.rename_to).name}",
-                            },
-                        )
-                    )
-                feed.appendChild(entry)
-
-        cat_style = main_doc.createProcessingInstruction(
-            "xml-stylesheet", 'type="text/xsl" href="opds.xsl"'
-        )
-        cat_doc.insertBefore(cat_style, cat_feed)
-
-        opds_xml_path = publish_folder.joinpath(f"{slugify(category, True)}.xml")
-        with opds_xml_path.open("wb") as f:  # type: ignore
-            f.write(cat_doc.toprettyxml(encoding="utf-8", indent=""))
-
-    main_style = main_doc.createProcessingInstruction(
-        "xml-stylesheet", 'type="text/xsl" href="opds.xsl"'
-    )
-    main_doc.insertBefore(main_style, main_feed)
+                generated_items = [(k, v) for k, v in publications.items() if v]
+                for recipe_name, books in sorted(
+                    generated_items,
+                    key=lambda item: item[1][0].published_dt,
+                    reverse=True,
+                ):
+                    entry = _opds_entry(category, recipe_name, books, recipe_covers)
+                    main_feed.write(entry)
+                    cat_feed.write(entry)
+                cat_feed.close()
 
-    opds_xml_path = publish_folder.joinpath(catalog_path)
-    with opds_xml_path.open("wb") as f:  # type: ignore
-        f.write(main_doc.toprettyxml(encoding="utf-8", indent=""))
+        main_feed.close()
 
 
-def _find_output(folder_path: Path, slug: str, ext: str) -> List[Path]:
+def _opds_entry(
+    category: str, recipe_name: str, books: List[RecipeOutput], recipe_covers: Dict
+) -> Tag:
     """
-    This is an improvement over using just glob because it finds outputs
-    more precisely by the exact slug.
-    Previously, if 2 recipes have similar slugs, e.g. "wsj" vs "wsj-print",
-    using glob will result in the wrong outputs being detected.
+    Build the OPDS entry for a recipe
+
+    :param category:
+    :param recipe_name:
+    :param books:
+    :param recipe_covers:
+    :return:
     """
-    slug_match_re = re.compile(slug + r"(-\d{4}-\d{2}-\d{2})?\." + ext)
-    res = folder_path.glob(f"{slug}*.{ext}")
-    return [r for r in res if slug_match_re.match(r.name)]
+    children = [
+        simple_tag("id", books[0].recipe.slug if books else recipe_name),
+        simple_tag("title", f"{books[0].title or recipe_name}"),
+        simple_tag(
+            "summary",
+            (
+                f"{books[0].title or recipe_name} published at "
+                f'{books[0].published_dt:{"%Y-%m-%d %I:%M%p %Z" if is_windows else "%Y-%m-%d %-I:%M%p %Z"}}'
+            ),
+        ),
+        simple_tag(
+            "content",
+            f"{books[0].description or recipe_name}",
+            attributes={"type": "text/html"},
+        ),
+        simple_tag("updated", f"{books[0].published_dt:%Y-%m-%dT%H:%M:%SZ}"),
+        simple_tag("category", attributes={"label": category.title()}),
+        simple_tag("author", children=[simple_tag("name", category.title())]),
+    ]
+
+    # recipe_covers only has covers that were successfully extracted
+    covers = recipe_covers.get(books[0].recipe.slug)
+    if covers:
+        children.append(
+            simple_tag(
+                "link",
+                attributes={
+                    "rel": "http://opds-spec.org/image",
+                    "type": "image/jpeg",
+                    "href": covers["cover"],
+                },
+            )
+        )
+        children.append(
+            simple_tag(
+                "link",
+                attributes={
+                    "rel": "http://opds-spec.org/image/thumbnail",
+                    "type": "image/jpeg",
+                    "href": covers["thumbnail"],
+                },
+            )
+        )
+
+    for book in books:
+        book_ext = Path(book.file).suffix
+        link_type = (
+            extension_contenttype_map.get(book_ext) or "application/octet-stream"
+        )
+        children.append(
+            simple_tag(
+                "link",
+                attributes={
+                    "rel": "http://opds-spec.org/acquisition",
+                    "type": link_type,
+                    "href": f"{Path(book.rename_to).name}",
+                },
+            )
+        )
+    return simple_tag("entry", children=children)
 
 
 def _get_cached_files(recipe: Recipe, cached: Dict):
@@ -292,68 +347,131 @@ def _get_cached_files(recipe: Recipe, cached: Dict):
     return cached.get(recipe.slug, []) or cached.get(recipe.name, [])
 
 
+def _download_file(
+    url: str,
+    file_path: Path,
+    cache_sess: requests.Session,
+    expected_size: Optional[int] = None,
+    expected_sha256: Optional[str] = None,
+    attempts: int = 1,
+    log: logging.Logger = logger,
+) -> bool:
+    """
+    Download a file, resuming interrupted transfers with Range requests
+
+    :param url:
+    :param file_path:
+    :param cache_sess:
+    :param expected_size: Verify the downloaded size if known
+    :param expected_sha256: Verify the downloaded content if known
+    :param attempts:
+    :param log:
+    :return: True if downloaded
+    """
+    part_file_path = file_path.with_name(f"{file_path.name}.part")
+    part_file_path.unlink(missing_ok=True)
+    for attempt in range(attempts):
+        downloaded = part_file_path.stat().st_size if part_file_path.exists() else 0
+        headers = {"Range": f"bytes={downloaded}-"} if downloaded else {}
+        try:
+            log.debug(
+                f'Downloading "{url}"'
+                + (f" from byte {downloaded}..." if downloaded else "...")
+            )
+            with cache_sess.get(
+                url, headers=headers, timeout=(10, 30), stream=True
+            ) as ebook_res:
+                if ebook_res.status_code == 416:
+                    # requested range not satisfiable, start over
+                    part_file_path.unlink(missing_ok=True)
+                    raise requests.exceptions.HTTPError(
+                        "416 Range Not Satisfiable", response=ebook_res
+                    )
+                ebook_res.raise_for_status()
+                # server may ignore the Range header and send the whole file
+                mode = "ab" if ebook_res.status_code == 206 else "wb"
+                with part_file_path.open(mode) as f:
+                    for chunk in ebook_res.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+            file_size = part_file_path.stat().st_size
+            if expected_size is not None and file_size != expected_size:
+                part_file_path.unlink(missing_ok=True)
+                raise ValueError(
+                    f"Size mismatch for {url}: {file_size} != {expected_size}"
+                )
+            if expected_sha256 and file_hash([part_file_path]) != expected_sha256:
+                part_file_path.unlink(missing_ok=True)
+                raise ValueError(f"Checksum mismatch for {url}")
+            part_file_path.replace(file_path)
+            return True
+        except (
+            requests.exceptions.RequestException,  # e.g. ReadTimeout, ConnectionError
+            ValueError,
+        ) as err:
+            if attempt < attempts - 1:
+                log.warning(
+                    f"{err.__class__.__name__} downloading {url}. "
+                    f"Retrying after {default_retry_wait_interval}s..."
+                )
+                time.sleep(default_retry_wait_interval)
+                continue
+            log.error(f"[!] {err.__class__.__name__} for {url}: {err}")
+    part_file_path.unlink(missing_ok=True)
+    return False
+
+
 def _download_from_cache(
-    recipe: Recipe, cached: Dict, publish_site: str, cache_sess: requests.Session
+    recipe: Recipe,
+    cached: Dict,
+    publish_site: str,
+    cache_sess: requests.Session,
+    outputs: OutputIndex,
+    log: logging.Logger = logger,
 ) -> bool:
     """
-    Download a recipe output from the published site
+    Download a recipe's outputs from the published site concurrently
     :param recipe:
     :param cached:
     :param publish_site:
     :param cache_sess:
-    :return:
+    :param outputs: Index of the publish folder
+    :param log:
+    :return: True if any of the formats could not be downloaded
     """
-    abort = False
-    cached_files = _get_cached_files(recipe, cached)
-    for cached_item in cached_files:
-        ext = Path(cached_item["filename"]).suffix
-        if ext != f".{recipe.src_ext}" and ext not in [
-            f".{x}" for x in recipe.target_ext
-        ]:
-            continue
-
-        ebook_url = urljoin(publish_site, cached_item["filename"])
-        try:
-            # see if this fixes the ReadTimeout for large files, e.g. WSJ-print
-            cache_sess.head(ebook_url, timeout=5)
-        except (
-            requests.exceptions.ReadTimeout,
-            requests.exceptions.HTTPError,  # it happens
-            requests.exceptions.ConnectionError,  # e.g. Connection aborted.
-        ) as head_err:  # noqa
-            logger.warning(
-                f"{head_err.__class__.__name__} sending HEAD request for {ebook_url}"
+    cached_files = [
+        cached_item
+        for cached_item in _get_cached_files(recipe, cached)
+        if Path(cached_item["filename"]).suffix
+        in [f".{x}" for x in [recipe.src_ext] + recipe.target_ext]
+    ]
+    if not cached_files:
+        return False
+
+    with ThreadPoolExecutor(max_workers=len(cached_files)) as executor:
+        downloads = [
+            (
+                cached_item,
+                executor.submit(
+                    _download_file,
+                    urljoin(publish_site, cached_item["filename"]),
+                    publish_folder.joinpath(cached_item["filename"]),
+                    cache_sess,
+                    expected_size=cached_item.get("size"),
+                    expected_sha256=cached_item.get("sha256"),
+                    attempts=1 + recipe.retry_attempts,
+                    log=log,
+                ),
             )
-            time.sleep(default_retry_wait_interval)
-
-        timeout = 30
-        for attempt in range(1 + recipe.retry_attempts):
-            try:
-                logger.debug(f'Downloading "{ebook_url}"...')
-                ebook_res = cache_sess.get(ebook_url, timeout=timeout, stream=True)
-                ebook_res.raise_for_status()
-                with publish_folder.joinpath(cached_item["filename"]).open("wb") as f:
-                    shutil.copyfileobj(ebook_res.raw, f)
-                abort = False
-                break
-            except (
-                requests.exceptions.ReadTimeout,
-                requests.exceptions.HTTPError,  # it happens
-                requests.exceptions.ConnectionError,  # e.g. Connection aborted.
-            ) as err:
-                if attempt < recipe.retry_attempts:
-                    logger.warning(
-                        f"{err.__class__.__name__} downloading {ebook_url}. "
-                        f"Retrying after {default_retry_wait_interval}s..."
-                    )
-                    timeout += 30
-                    time.sleep(default_retry_wait_interval)
-                    continue
-                logger.error(f"[!] {err.__class__.__name__} for {ebook_url}")
-                abort = True
-                if ext == f".{recipe.src_ext}":
-                    # if primary format, abort early
-                    return abort
+            for cached_item in cached_files
+        ]
+    abort = False
+    for cached_item, download in downloads:
+        outputs.refresh(publish_folder.joinpath(cached_item["filename"]))
+        if not download.result():
+            abort = True
+            if Path(cached_item["filename"]).suffix == f".{recipe.src_ext}":
+                # primary format is required
+                return abort
     return abort
 
 
@@ -369,6 +487,849 @@ def _linkify_attrs(attrs, _=False):
     return attrs
 
 
+def _get_recipe_env(
+    recipe: Recipe,
+    verbose_mode: bool,
+    trace_file_path: Optional[Path] = None,
+    checkpoint_folder: Optional[Path] = None,
+    article_store_folder: Optional[Path] = None,
+) -> Dict[str, str]:
+    """
+    Build the environment variables for a recipe's ebook-convert processes.
+    This is kept per recipe instead of on os.environ so that concurrently
+    running recipes do not clobber each other's settings.
+
+    :param recipe:
+    :param verbose_mode:
+    :param trace_file_path: File the recipe writes its trace events to
+    :param checkpoint_folder: Folder the recipe saves its progress to so that
+                              a retry can resume from it
+    :param article_store_folder: Folder for articles shared by the recipes in the run
+    :return:
+    """
+    recipe_env = os.environ.copy()
+    if Path(f"{recipe.recipe}.recipe").exists():
+        recipe_env["newsrack_title_dt_format"] = recipe.title_date_format
+        recipe_env["newsrack_title_dts_format"] = recipe.recipe_datetime_format
+    if verbose_mode:
+        # set recipe debug output folder
+        recipe_env["recipe_debug_folder"] = str(publish_folder.absolute())
+    if trace_file_path:
+        recipe_env["newsrack_trace_file"] = str(trace_file_path.absolute())
+    if checkpoint_folder:
+        recipe_env["newsrack_checkpoint_dir"] = str(checkpoint_folder.absolute())
+    if article_store_folder:
+        recipe_env["newsrack_article_store_dir"] = str(article_store_folder.absolute())
+    # per recipe so that responses fetched with a recipe's cookies or credentials
+    # are never served to another recipe
+    recipe_env["newsrack_http_cache_dir"] = str(
+        http_cache_folder.joinpath(recipe.slug).absolute()
+    )
+    return recipe_env
+
+
+def _prune_http_cache(folder: Path, max_age: float) -> None:
+    """
+    Remove HTTP cache entries that have not been fetched or revalidated recently
+
+    :param folder:
+    :param max_age: seconds
+    :return:
+    """
+    if not folder.exists():
+        return
+    cutoff = time.time() - max_age
+    for entry_path in folder.glob("**/*"):
+        try:
+            if entry_path.is_file() and entry_path.stat().st_mtime < cutoff:
+                entry_path.unlink()
+        except OSError:
+            pass
+
+
+def _calibre_call(
+    cmd: List[str],
+    calibre_workers: Optional[CalibreWorkerPool],
+    timeout: Optional[float] = None,
+    env: Optional[Dict[str, str]] = None,
+    log: logging.Logger = logger,
+) -> Tuple[int, str]:
+    """
+    Run an ebook-convert/ebook-meta command in a calibre worker if available,
+    else in a new process.
+
+    :param cmd:
+    :param calibre_workers:
+    :param timeout:
+    :param env: Only used when run in a new process
+    :param log:
+    :return: Tuple of (exit code, output)
+    """
+    if calibre_workers:
+        try:
+            with calibre_workers.worker() as worker:
+                return worker.run(cmd, timeout=timeout)
+        except CalibreWorkerError as err:
+            log.warning(f"{err}. Running {cmd[0]} in a new process instead.")
+    proc = subprocess.run(
+        cmd,
+        timeout=timeout,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env,
+        encoding="utf-8",
+        errors="replace",
+    )
+    return proc.returncode, proc.stdout
+
+
+def _read_book_meta(
+    file_path: Path,
+    calibre_workers: Optional[CalibreWorkerPool],
+    log: logging.Logger = logger,
+) -> BookMeta:
+    """
+    Read a book's metadata directly from the file. For formats that cannot be
+    read directly, fall back to ebook-meta and read the OPF it writes.
+
+    :param file_path:
+    :param calibre_workers:
+    :param log:
+    :return:
+    """
+    log.debug(f'Get book meta info for "{file_path}"')
+    try:
+        book_meta = read_book_meta(file_path)
+        if book_meta:
+            return book_meta
+    except (OSError, ValueError, KeyError, struct.error, zipfile.BadZipFile) as err:
+        log.warning(f'Unable to read metadata from "{file_path}": {err}')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        opf_path = Path(temp_dir, "metadata.opf")
+        try:
+            exit_code, meta_out = _calibre_call(
+                ["ebook-meta", str(file_path), f"--to-opf={opf_path}"],
+                calibre_workers,
+                timeout=ebook_meta_timeout,
+                log=log,
+            )
+        except subprocess.TimeoutExpired:
+            log.warning(f'ebook-meta timed out for "{file_path}"')
+            return BookMeta()
+        try:
+            return read_opf(opf_path.read_bytes())
+        except (OSError, ElementTree.ParseError) as err:
+            log.warning(
+                f'ebook-meta failed for "{file_path}" ({exit_code}): {err}\n{meta_out}'
+            )
+    return BookMeta()
+
+
+def _recipe_source_hash(recipe: Recipe) -> str:
+    """
+    Hash of the recipe source, including the shared includes
+
+    :param recipe:
+    :return:
+    """
+    source_paths = [Path(f"{recipe.recipe}.recipe")] + sorted(
+        Path("recipes/includes").glob("*.py")
+    )
+    return file_hash(p for p in source_paths if p.exists())
+
+
+def _conv_options_hash(recipe: Recipe, ext: str) -> str:
+    """
+    Hash of the conversion options used to produce a format
+
+    :param recipe:
+    :param ext:
+    :return:
+    """
+    customised_css_filename = Path("static", f"{ext}.css")
+    return BuildCache.key(
+        (recipe.conv_options or {}).get(ext, []),
+        file_hash([customised_css_filename])
+        if customised_css_filename.exists()
+        else "",
+    )
+
+
+def _extract_cover(
+    book_file_path: Path,
+    cover_file_path: Path,
+    cover_thumbnail_file_path: Path,
+    ctx: RunContext,
+) -> None:
+    """
+    Extract a book's cover and save a downsized copy and thumbnail
+
+    :param book_file_path:
+    :param cover_file_path:
+    :param cover_thumbnail_file_path:
+    :param ctx:
+    :return:
+    """
+    with ctx.tracer.span("get-cover", file=book_file_path.name):
+        try:
+            cover_data = None
+            try:
+                cover_data = read_book_cover(book_file_path)
+            except (
+                OSError,
+                ValueError,
+                KeyError,
+                struct.error,
+                zipfile.BadZipFile,
+            ) as err:
+                logger.warning(f'Unable to read cover from "{book_file_path}": {err}')
+            if cover_data:
+                save_cover_and_thumbnail(
+                    BytesIO(cover_data), cover_file_path, cover_thumbnail_file_path
+                )
+                return
+
+            # let calibre extract the cover for other formats
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_cover_file_path = Path(temp_dir, "cover.jpg")
+                _ = _calibre_call(
+                    [
+                        "ebook-meta",
+                        f"--get-cover={str(temp_cover_file_path)}",
+                        str(book_file_path),
+                    ],
+                    ctx.calibre_workers,
+                    timeout=ebook_meta_timeout,
+                )
+                if temp_cover_file_path.exists():
+                    save_cover_and_thumbnail(
+                        temp_cover_file_path, cover_file_path, cover_thumbnail_file_path
+                    )
+        except Exception as get_cover_err:  # noqa, pylint: disable=broad-except
+            logger.warning(
+                "Unable to extract cover for %s: %s",
+                book_file_path.name,
+                str(get_cover_err),
+            )
+
+
+@dataclass
+class RecipeJob:
+    """The state of a recipe as it goes through the fetch and conversion stages"""
+
+    recipe: Recipe
+    log: logging.Logger  # logger for this recipe's messages
+    output: IO  # stream that subprocess output is written to
+    start_time: float = field(default_factory=timer)
+    outputs: List[RecipeOutput] = field(default_factory=list)
+    index: List[Dict] = field(default_factory=list)
+    last_run: Optional[float] = None
+    status: str = ""
+    source_file_path: Optional[Path] = None
+    summary: str = ""
+    started: float = field(default_factory=time.time)
+    retries: int = 0
+    fetch_duration: Optional[float] = None  # duration of the last recipe run
+    stats: Optional[RecipeRunStats] = None
+
+    def finish(self, status: str) -> None:
+        recipe_elapsed_time = timedelta(seconds=timer() - self.start_time)
+        self.log.info(
+            f'{"=" * 20} "{self.recipe.name}" recipe took {humanize.precisedelta(recipe_elapsed_time)} {"=" * 20}'
+        )
+        self.summary = _add_recipe_summary(self.recipe, status, recipe_elapsed_time)
+        self.stats = RecipeRunStats(
+            started=self.started,
+            duration=recipe_elapsed_time.total_seconds(),
+            outcome=outcome_from_status(status),
+            fetch_duration=self.fetch_duration,
+            retries=self.retries,
+            size=sum(i.get("size", 0) for i in self.index),
+        )
+
+    def result(self) -> RecipeRunResult:
+        return RecipeRunResult(
+            recipe=self.recipe,
+            outputs=self.outputs,
+            index=self.index,
+            last_run=self.last_run,
+            summary=self.summary,
+            stats=self.stats,
+        )
+
+
+def _fetch_recipe(job: RecipeJob, ctx: RunContext) -> bool:
+    """
+    Fetch stage: run the recipe (or restore it from cache) to get the source book
+
+    :param job:
+    :param ctx: Shared run state
+    :return: True if the source book is ready for the conversion stage
+    """
+    recipe = job.recipe
+    log = job.log
+    log.info(f'{"-" * 20} Executing "{recipe.name}" recipe... {"-" * 30}')
+
+    trace_file_path = Path(
+        tempfile.gettempdir(), f"newsrack-trace-{os.getpid()}-{recipe.slug}.jsonl"
+    )
+    checkpoint_folder = Path(
+        tempfile.gettempdir(), f"newsrack-checkpoint-{os.getpid()}-{recipe.slug}"
+    )
+    recipe_env = _get_recipe_env(
+        recipe,
+        ctx.verbose_mode,
+        trace_file_path,
+        # only a retried attempt can resume from a checkpoint
+        checkpoint_folder if recipe.retry_attempts > 0 else None,
+        ctx.article_store_folder,
+    )
+    recipe_path = Path(f"{recipe.recipe}.recipe")
+    source_file_name = Path(f"{recipe.slug}.{recipe.src_ext}")
+    source_file_path = publish_folder.joinpath(source_file_name)
+    cmd = [
+        "ebook-convert",
+        str(recipe_path),
+        str(source_file_path),
+    ]
+    try:
+        recipe_account = ctx.accounts_info.get(recipe.slug, {})
+        recipe_username = recipe_account.get("username", None)
+        recipe_password = recipe_account.get("password", None)
+        if recipe_username and recipe_password:
+            cmd.extend(
+                [f"--username={recipe_username}", f"--password={recipe_password}"]
+            )
+    except:  # noqa, pylint: disable=bare-except
+        pass
+    if recipe.conv_options and recipe.conv_options.get(recipe.src_ext):
+        cmd.extend(recipe.conv_options[recipe.src_ext])
+    customised_css_filename = Path("static", f"{recipe.src_ext}.css")
+    if customised_css_filename.exists():
+        cmd.append(f"--extra-css={str(customised_css_filename)}")
+    if ctx.verbose_mode:
+        cmd.append("-vv")
+
+    exit_code = 0
+
+    cached_files = _get_cached_files(recipe, ctx.cached)
+
+    if not ctx.outputs.find(recipe.slug, recipe.src_ext):
+        # existing file does not exist
+        try:
+            if (
+                # regenerate restriction is not in place and recipe is enabled
+                (recipe.is_enabled() and not ctx.regenerate_recipes_slugs)
+                # regenerate restriction is in place and recipe is included
+                or (
+                    ctx.regenerate_recipes_slugs
+                    and recipe.slug in ctx.regenerate_recipes_slugs
+                )
+                # not cached (so that we always have a copy available)
+                or not cached_files
+            ):
+                if recipe.timeout is None:  # not seeded from the run history
+                    recipe.timeout = default_recipe_timeout
+                original_recipe_timeout = recipe.timeout
+                # retries resume from the progress saved in the checkpoint folder
+                shutil.rmtree(checkpoint_folder, ignore_errors=True)
+                for attempt in range(recipe.retry_attempts + 1):
+                    try:
+                        # run recipe
+                        trace_file_path.unlink(missing_ok=True)
+                        fetch_start_time = timer()
+                        with ctx.tracer.span(
+                            "fetch", recipe=recipe.slug, attempt=attempt + 1
+                        ):
+                            exit_code = subprocess.call(
+                                cmd,
+                                timeout=recipe.timeout,
+                                stdout=job.output,
+                                stderr=subprocess.STDOUT,
+                                env=recipe_env,
+                            )
+                        # timed out attempts are not representative
+                        job.fetch_duration = timer() - fetch_start_time
+                        ctx.outputs.refresh(source_file_path)
+                        break
+                    except subprocess.TimeoutExpired:
+                        if attempt < recipe.retry_attempts:
+                            job.retries += 1
+                            recipe_elapsed_time = timedelta(
+                                seconds=timer() - job.start_time
+                            )
+                            wait_interval = ceil(recipe.timeout / 100)
+                            log.warning(
+                                f"TimeoutExpired fetching '{recipe.name}' "
+                                f"after {humanize.precisedelta(recipe_elapsed_time)}. "
+                                f"Retrying after {wait_interval}s..."
+                            )
+                            # increase recipe timeout by 10% on retry but up to a max of 20min
+                            recipe.timeout = max(int(1.1 * recipe.timeout), 20 * 60)
+                            time.sleep(max(min(wait_interval, 2), 10))
+                            continue
+                        raise
+                    finally:
+                        # it's not used anymore, but restore original timeout
+                        # value just in case
+                        recipe.timeout = original_recipe_timeout
+                        ctx.tracer.add_events_file(
+                            trace_file_path, f"{recipe.name} (attempt {attempt + 1})"
+                        )
+                        trace_file_path.unlink(missing_ok=True)
+
+                shutil.rmtree(checkpoint_folder, ignore_errors=True)
+                job.last_run = time.time()
+
+            else:
+                # use cache
+                log.warning(f'Using cached copy for "{recipe.name}".')
+                with ctx.tracer.span("cache download", recipe=recipe.slug):
+                    abort_recipe = _download_from_cache(
+                        recipe,
+                        ctx.cached,
+                        ctx.publish_site,
+                        ctx.cache_sess,
+                        ctx.outputs,
+                        log,
+                    )
+                if not abort_recipe:
+                    job.status = ":outbox_tray: From cache"
+                else:
+                    job.finish(":x: Cache Timeout")
+                    return False
+
+        except subprocess.TimeoutExpired:
+            shutil.rmtree(checkpoint_folder, ignore_errors=True)
+            log.exception(f"[!] TimeoutExpired fetching '{recipe.name}'")
+            job.finish(":x: Convert Timeout")
+            return False
+    else:
+        job.status = ":file_folder: From local"
+
+    source_file_paths = ctx.outputs.find(recipe.slug, recipe.src_ext)
+    if cached_files and not source_file_paths:
+        log.warning(
+            f'Using cached copy for "{recipe.name}" because recipe has no output.'
+        )
+        # try to use cached copy if recipe does not have output
+        # for example FT(Print) has no weekend issue, so we'll try to keep the last issue
+        with ctx.tracer.span("cache download", recipe=recipe.slug):
+            _ = _download_from_cache(
+                recipe, ctx.cached, ctx.publish_site, ctx.cache_sess, ctx.outputs, log
+            )
+        source_file_paths = ctx.outputs.find(recipe.slug, recipe.src_ext)
+        if source_file_paths:
+            exit_code = (
+                0  # reset exit_code (not 0 because of failed recipe ebook-convert)
+            )
+            job.status = ":outbox_tray: From cache"
+
+    if not source_file_paths:
+        log.error(
+            f"Unable to find source generated: '/{recipe.slug}*.{recipe.src_ext}'"
+        )
+        job.finish(":x: No output")
+        return False
+
+    job.source_file_path = source_file_paths[-1]
+    # if the recipe exited with an error, the output is not used
+    return not exit_code
+
+
+def _convert_recipe(job: RecipeJob, ctx: RunContext) -> None:
+    """
+    Conversion stage: read the source book's metadata, set the cover
+    and convert it into the target formats
+
+    :param job:
+    :param ctx: Shared run state
+    :return:
+    """
+    recipe = job.recipe
+    log = job.log
+    recipe_env = _get_recipe_env(recipe, ctx.verbose_mode)
+    source_file_path: Path = job.source_file_path  # type: ignore[assignment]
+    source_file_name = Path(source_file_path.name)
+
+    with ctx.tracer.span("ebook-meta", recipe=recipe.slug):
+        book_meta = _read_book_meta(source_file_path, ctx.calibre_workers, log=log)
+    pub_date = book_meta.pubdate or ctx.today
+    title = book_meta.title
+    rename_file_name = Path(f"{recipe.slug}-{pub_date:%Y-%m-%d}.{recipe.src_ext}")
+
+    comments = book_meta.comments
+    description = ""
+    if comments:
+        try:
+            description = (
+                f"{comments[0]}"
+                f'<ul><li>{"</li><li>".join(book_meta.articles)}</li></ul>'
+                f"{linkify(comments[-1], callbacks=[_linkify_attrs])}"
+            )
+        except:  # noqa, pylint: disable=bare-except
+            pass
+
+    job.outputs.append(
+        RecipeOutput(
+            recipe=recipe,
+            title=title,
+            file=source_file_name,
+            rename_to=rename_file_name,
+            published_dt=pub_date,
+            description=description,
+            articles=book_meta.articles,
+        )
+    )
+
+    pseudo_series_index = pub_date.year * 1000 + pub_date.timetuple().tm_yday
+    series_args = [
+        f"--series={recipe.name}",
+        f"--index={pseudo_series_index}",
+        f"--publisher={ctx.publish_site}",
+    ]
+    recipe_source_hash = _recipe_source_hash(recipe)
+    # (rename_file_name != source_file_name) checks that it is a newly generated file
+    # so that we don't regenerate the cover needlessly
+    if recipe.overwrite_cover and title and rename_file_name != source_file_name:
+        # customise cover
+        cache_key = ctx.build_cache.key(
+            "cover",
+            recipe.slug,
+            recipe_source_hash,
+            file_hash([source_file_path]),
+            title,
+            repr(recipe.cover_options),
+            series_args,
+        )
+        if ctx.build_cache.restore(cache_key, source_file_path):
+            log.debug(f'Restored cover for "{source_file_path}" from build cache')
+        else:
+            log.debug(f'Setting cover for "{source_file_path}"')
+            try:
+                cover_file_path = Path(f"{str(source_file_path)}.png")
+                with ctx.tracer.span("generate cover", recipe=recipe.slug):
+                    generate_cover(
+                        cover_file_path,
+                        title,
+                        recipe.cover_options,
+                        logger=log,
+                        logo_cache_folder=meta_folder.joinpath(logo_cache_folder_name),
+                    )
+                cover_cmd = [
+                    "ebook-meta",
+                    str(source_file_path),
+                    f"--cover={str(cover_file_path)}",
+                ] + series_args
+                with ctx.tracer.span("set cover", recipe=recipe.slug):
+                    exit_code, _ = _calibre_call(
+                        cover_cmd,
+                        ctx.calibre_workers,
+                        timeout=ebook_meta_timeout,
+                        log=log,
+                    )
+                cover_file_path.unlink()
+                if not exit_code:
+                    ctx.build_cache.store(cache_key, source_file_path)
+            except Exception:  # noqa, pylint: disable=broad-except
+                log.exception("Error generating cover")
+    elif rename_file_name != source_file_name:
+        # just set series name
+        cache_key = ctx.build_cache.key(
+            "series",
+            recipe.slug,
+            recipe_source_hash,
+            file_hash([source_file_path]),
+            series_args,
+        )
+        if not ctx.build_cache.restore(cache_key, source_file_path):
+            series_cmd = ["ebook-meta", str(source_file_path)] + series_args
+            try:
+                exit_code, _ = _calibre_call(
+                    series_cmd,
+                    ctx.calibre_workers,
+                    timeout=ebook_meta_timeout,
+                    log=log,
+                )
+                if not exit_code:
+                    ctx.build_cache.store(cache_key, source_file_path)
+            except subprocess.TimeoutExpired:
+                log.warning(f'Timed out setting series for "{source_file_path}"')
+
+    job.index.append(
+        {
+            "filename": f"{recipe.slug}-{pub_date:%Y-%m-%d}.{recipe.src_ext}",
+            "published": pub_date.timestamp(),
+            "size": source_file_path.stat().st_size,
+            "sha256": file_hash([source_file_path]),
+            "recipe_hash": recipe_source_hash,
+            "conv_hash": _conv_options_hash(recipe, recipe.src_ext),
+        }
+    )
+
+    # convert generate book into alternative formats
+    exit_code = 0
+    for ext in recipe.target_ext:
+        target_file_name = Path(f"{recipe.slug}.{ext}")
+        target_file_path = Path(publish_folder, target_file_name)
+
+        cmd = [
+            "ebook-convert",
+            str(source_file_path),
+            str(target_file_path),
+            f"--series={recipe.name}",
+            f"--series-index={pseudo_series_index}",
+            f"--publisher={ctx.publish_site}",
+        ]
+        if recipe.conv_options and recipe.conv_options.get(ext):
+            cmd.extend(recipe.conv_options[ext])
+
+        customised_css_filename = Path("static", f"{ext}.css")
+        if customised_css_filename.exists():
+            cmd.append(f"--extra-css={str(customised_css_filename)}")
+        if not ctx.outputs.find(recipe.slug, ext):
+            cache_key = ctx.build_cache.key(
+                "convert",
+                recipe.slug,
+                recipe_source_hash,
+                file_hash([source_file_path]),
+                ext,
+                cmd[3:],
+                file_hash([customised_css_filename])
+                if customised_css_filename.exists()
+                else "",
+            )
+            if ctx.build_cache.restore(cache_key, target_file_path):
+                ctx.outputs.add(target_file_path)
+                log.debug(f'Restored "{target_file_path}" from build cache')
+                exit_code = 0
+            else:
+                with ctx.tracer.span(f"convert {ext}", recipe=recipe.slug):
+                    exit_code, convert_output = _calibre_call(
+                        cmd + (["-vv"] if ctx.verbose_mode else []),
+                        ctx.calibre_workers,
+                        timeout=recipe.timeout,
+                        env=recipe_env,
+                        log=log,
+                    )
+                job.output.write(convert_output)
+                job.output.flush()
+                ctx.outputs.refresh(target_file_path)
+                if not exit_code and target_file_path.exists():
+                    ctx.build_cache.store(cache_key, target_file_path)
+
+        if not exit_code:
+            target_file_path = ctx.outputs.find(recipe.slug, ext)[-1]
+            target_file_name = Path(target_file_path.name)
+
+            job.outputs.append(
+                RecipeOutput(
+                    recipe=recipe,
+                    title=title,
+                    file=target_file_name,
+                    rename_to=f"{recipe.slug}-{pub_date:%Y-%m-%d}.{ext}",
+                    published_dt=pub_date,
+                    description=comments,
+                    articles=book_meta.articles,
+                )
+            )
+            job.index.append(
+                {
+                    "filename": f"{recipe.slug}-{pub_date:%Y-%m-%d}.{ext}",
+                    "published": pub_date.timestamp(),
+                    "size": target_file_path.stat().st_size,
+                    "sha256": file_hash([target_file_path]),
+                    "recipe_hash": recipe_source_hash,
+                    "conv_hash": _conv_options_hash(recipe, ext),
+                }
+            )
+
+    job.finish(job.status or ":white_check_mark: Completed")
+
+
+def _new_buffered_job(recipe: Recipe) -> RecipeJob:
+    """
+    Create a job with its log and subprocess output held in a temp file,
+    so that the output of concurrently running recipes don't interleave.
+
+    :param recipe:
+    :return:
+    """
+    recipe_output = tempfile.TemporaryFile("w+", encoding="utf-8")
+    recipe_logger = logging.getLogger(f"newsrack.{recipe.slug}")
+    recipe_logger.propagate = False
+    recipe_logger.setLevel(logger.level)
+    recipe_logger.handlers = [logging.StreamHandler(recipe_output)]
+    return RecipeJob(recipe=recipe, log=recipe_logger, output=recipe_output)
+
+
+def _flush_buffered_job(job: RecipeJob) -> None:
+    """
+    Write out a buffered job's output as a single group
+
+    :param job:
+    :return:
+    """
+    job.log.handlers = []
+    job.output.seek(0)
+    logger.info(f"::group::{job.recipe.name}")
+    shutil.copyfileobj(job.output, sys.stdout)
+    logger.info("::endgroup::")
+    job.output.close()
+
+
+def _fetch_and_convert_recipe(job: RecipeJob, ctx: RunContext) -> bool:
+    """
+    Run both stages of a recipe in the same worker
+
+    :param job:
+    :param ctx:
+    :return: Always False since there is nothing left for the conversion stage
+    """
+    if _fetch_recipe(job, ctx):
+        _convert_recipe(job, ctx)
+    return False
+
+
+def _next_queued_recipe(
+    pending: List[Tuple[int, Recipe]],
+    running_groups: Dict[str, int],
+    jobs_per_group: int,
+) -> Optional[Tuple[int, Recipe]]:
+    """
+    Get the first pending recipe whose concurrency group is not at its limit.
+
+    :param pending: List of (position, recipe)
+    :param running_groups: Number of running recipes by concurrency key
+    :param jobs_per_group: Max number of recipes with the same key allowed to run at the same time
+    :return:
+    """
+    for queued_recipe in pending:
+        _, recipe = queued_recipe
+        if running_groups.get(recipe.get_concurrency_key(), 0) < jobs_per_group:
+            return queued_recipe
+    return None
+
+
+def _order_by_expected_duration(
+    queued: List[Tuple[int, Recipe]],
+    job_log: Dict[str, RecipeHistory],
+    regenerate_recipes_slugs: List[str],
+) -> List[Tuple[int, Recipe]]:
+    """
+    Order recipes by their expected duration, longest first.
+    Recipes without history are assumed to take the median duration.
+
+    :param queued: List of (position, recipe)
+    :param job_log:
+    :param regenerate_recipes_slugs:
+    :return:
+    """
+    expected_durations: Dict[int, Optional[float]] = {}
+    for pos, recipe in queued:
+        will_fetch = (
+            recipe.slug in regenerate_recipes_slugs
+            if regenerate_recipes_slugs
+            else recipe.is_enabled()
+        )
+        history = job_log.get(recipe.slug)
+        expected_durations[pos] = (
+            history.expected_duration(will_fetch) if history else None
+        )
+    known_durations = [d for d in expected_durations.values() if d is not None]
+    default_duration = median(known_durations) if known_durations else 0
+    return sorted(
+        queued,
+        key=lambda item: expected_durations[item[0]] or default_duration,
+        reverse=True,
+    )
+
+
+def _execute_recipes(
+    queued: List[Tuple[int, Recipe]],
+    ctx: RunContext,
+    jobs: int,
+    jobs_per_group: int = 1,
+    convert_jobs: int = 0,
+) -> Dict[int, RecipeRunResult]:
+    """
+    Run the queued recipes. Recipes are fetched concurrently if jobs > 1.
+    If convert_jobs > 0, a recipe's conversion stage is queued for a separate
+    pool of workers once it's fetched, so that it overlaps with the fetching
+    of the next recipes.
+
+    :param queued: List of (position, recipe)
+    :param ctx:
+    :param jobs: Max number of recipes to fetch at the same time
+    :param jobs_per_group: Max number of recipes with the same concurrency key to fetch at the same time
+    :param convert_jobs: Max number of recipes to convert at the same time
+    :return: Results keyed by position so that they can be merged in order
+    """
+    # a group limit below 1 would never let a queued recipe start
+    jobs_per_group = max(1, jobs_per_group)
+    results: Dict[int, RecipeRunResult] = {}
+    if jobs <= 1 and convert_jobs <= 0:
+        for pos, recipe in queued:
+            logger.info(f"::group::{recipe.name}")
+            job = RecipeJob(recipe=recipe, log=logger, output=sys.stdout)
+            _fetch_and_convert_recipe(job, ctx)
+            results[pos] = job.result()
+            logger.info("::endgroup::")
+        return results
+
+    fetch_fn = _fetch_recipe if convert_jobs > 0 else _fetch_and_convert_recipe
+    pending = list(queued)
+    running_groups: Dict[str, int] = {}
+    fetch_futures: Dict[Future, Tuple[int, RecipeJob]] = {}
+    convert_futures: Dict[Future, Tuple[int, RecipeJob]] = {}
+    with (
+        ThreadPoolExecutor(
+            max_workers=max(jobs, 1), thread_name_prefix="fetch"
+        ) as fetch_executor,
+        ThreadPoolExecutor(
+            max_workers=max(convert_jobs, 1), thread_name_prefix="convert"
+        ) as convert_executor,
+    ):
+        while pending or fetch_futures or convert_futures:
+            # fill idle workers, skipping over recipes whose group is already at its limit
+            while len(fetch_futures) < max(jobs, 1):
+                queued_recipe = _next_queued_recipe(
+                    pending, running_groups, jobs_per_group
+                )
+                if not queued_recipe:
+                    break
+                pending.remove(queued_recipe)
+                pos, recipe = queued_recipe
+                concurrency_key = recipe.get_concurrency_key()
+                running_groups[concurrency_key] = (
+                    running_groups.get(concurrency_key, 0) + 1
+                )
+                job = _new_buffered_job(recipe)
+                fetch_futures[fetch_executor.submit(fetch_fn, job, ctx)] = (pos, job)
+
+            done, _ = wait(
+                list(fetch_futures) + list(convert_futures),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                if future in fetch_futures:
+                    pos, job = fetch_futures.pop(future)
+                    running_groups[job.recipe.get_concurrency_key()] -= 1
+                    if future.result():
+                        # queue for the conversion stage
+                        convert_futures[
+                            convert_executor.submit(_convert_recipe, job, ctx)
+                        ] = (pos, job)
+                        continue
+                else:
+                    pos, job = convert_futures.pop(future)
+                    future.result()
+                _flush_buffered_job(job)
+                results[pos] = job.result()
+    return results
+
+
 def run(
     publish_site: str,
     source_url: str,
@@ -377,6 +1338,10 @@ def run(
     run_id: str,
     run_url: str,
     verbose_mode: bool,
+    jobs: int = 1,
+    jobs_per_group: int = 1,
+    convert_jobs: int = 0,
+    use_calibre_worker: bool = True,
 ) -> None:
     # set path to recipe includes in os environ so that recipes can pick it up
     os.environ["recipes_includes"] = str(Path("recipes/includes/").absolute())
@@ -388,15 +1353,20 @@ def run(
     if not publish_site.endswith("/"):
         publish_site += "/"
 
-    job_log: Dict[str, float] = {}
+    job_log: Dict[str, RecipeHistory] = {}
     try:
-        with meta_folder.joinpath(job_log_filename).open("r", encoding="utf-8") as f:
-            job_log = json.load(f)
+        job_log = load_job_log(meta_folder.joinpath(job_log_filename))
     except Exception as err:  # noqa, pylint: disable=broad-except
         logger.warning(f"Unable to load job log: {err}")
 
     today = datetime.utcnow().replace(tzinfo=timezone.utc)
     cache_sess = requests.Session()
+    # enough connections for all concurrent cache downloads
+    cache_adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=max(jobs, 1) * 4
+    )
+    cache_sess.mount("http://", cache_adapter)
+    cache_sess.mount("https://", cache_adapter)
     cached = _fetch_cache(publish_site, cache_sess)
     index = {}  # type: ignore
     recipe_descriptions = {}
@@ -411,9 +1381,37 @@ def run(
     start_time = timer()
 
     accounts_info = _get_env_accounts_info()
+    _prune_http_cache(http_cache_folder, http_cache_max_age)
+    # the build cache used to be kept in meta/ and would otherwise be uploaded again
+    shutil.rmtree(meta_folder.joinpath("build_cache"), ignore_errors=True)
+
+    ctx = RunContext(
+        publish_site=publish_site,
+        cached=cached,
+        cache_sess=cache_sess,
+        accounts_info=accounts_info,
+        regenerate_recipes_slugs=regenerate_recipes_slugs,
+        verbose_mode=verbose_mode,
+        today=today,
+        calibre_workers=(
+            # without a separate conversion pool, each fetch job converts inline
+            CalibreWorkerPool(convert_jobs if convert_jobs > 0 else max(jobs, 1))
+            if use_calibre_worker and is_calibre_worker_available()
+            else None
+        ),
+        build_cache=BuildCache(build_cache_folder),
+        tracer=Tracer(),
+        outputs=OutputIndex(publish_folder),
+        # for recipes that enable BasicNewsrackRecipe.share_articles
+        article_store_folder=Path(
+            tempfile.gettempdir(), f"newsrack-articles-{os.getpid()}"
+        ),
+    )
 
     recipes: List[Recipe] = custom_recipes or default_recipes
-    for recipe in recipes:
+    run_results: Dict[int, RecipeRunResult] = {}
+    queued: List[Tuple[int, Recipe]] = []
+    for pos, recipe in enumerate(recipes):
         recipe_path = Path(f"{recipe.recipe}.recipe")
         if not recipe.name:
             try:
@@ -440,512 +1438,206 @@ def run(
                 logger.exception("Error getting recipe name")
                 continue
 
-        if recipe_path.exists():
-            os.environ["newsrack_title_dt_format"] = recipe.title_date_format
-            os.environ["newsrack_title_dts_format"] = recipe.recipe_datetime_format
-
-        job_status = ""
-        recipe.last_run = job_log.get(recipe.slug, 0)
-        logger.info(f"::group::{recipe.name}")
+        recipe_history = job_log.setdefault(recipe.slug, RecipeHistory())
+        recipe.last_run = recipe_history.last_run
+        if recipe.timeout is None:
+            # only for recipes without a configured timeout
+            recipe.timeout = recipe_history.seeded_timeout() or default_recipe_timeout
 
         if recipe.slug in skip_recipes_slugs:
             logger.info(f'[!] SKIPPED recipe: "{recipe.slug}"')
-            logger.info("::endgroup::")
-            job_summary += _add_recipe_summary(recipe, ":arrow_right_hook: Skipped")
+            run_results[pos] = RecipeRunResult(
+                recipe=recipe,
+                outputs=None,
+                index=[],
+                last_run=None,
+                summary=_add_recipe_summary(recipe, ":arrow_right_hook: Skipped"),
+                stats=None,
+            )
             continue
 
-        logger.info(f'{"-" * 20} Executing "{recipe.name}" recipe... {"-" * 30}')
-        recipe_start_time = timer()
+        queued.append((pos, recipe))
 
-        if recipe.category not in generated:
-            generated[recipe.category] = {}
-        generated[recipe.category][recipe.name] = []
-        index[recipe.slug] = []
+    if jobs > 1:
+        # start the longest running recipes first so that they don't hold up the end of the run
+        queued = _order_by_expected_duration(queued, job_log, regenerate_recipes_slugs)
 
-        source_file_name = Path(f"{recipe.slug}.{recipe.src_ext}")
-        source_file_path = publish_folder.joinpath(source_file_name)
-        cmd = [
-            "ebook-convert",
-            str(recipe_path),
-            str(source_file_path),
-        ]
-        try:
-            recipe_account = accounts_info.get(recipe.slug, {})
-            recipe_username = recipe_account.get("username", None)
-            recipe_password = recipe_account.get("password", None)
-            if recipe_username and recipe_password:
-                cmd.extend(
-                    [f"--username={recipe_username}", f"--password={recipe_password}"]
-                )
-        except:  # noqa, pylint: disable=bare-except
-            pass
-        if recipe.conv_options and recipe.conv_options.get(recipe.src_ext):
-            cmd.extend(recipe.conv_options[recipe.src_ext])
-        customised_css_filename = Path("static", f"{recipe.src_ext}.css")
-        if customised_css_filename.exists():
-            cmd.append(f"--extra-css={str(customised_css_filename)}")
-        if verbose_mode:
-            cmd.append("-vv")
-
-        exit_code = 0
-
-        # set recipe debug output folder
-        if verbose_mode:
-            os.environ["recipe_debug_folder"] = str(publish_folder.absolute())
-
-        cached_files = _get_cached_files(recipe, cached)
-
-        if not _find_output(publish_folder, recipe.slug, recipe.src_ext):
-            # existing file does not exist
-            try:
-                if (
-                    # regenerate restriction is not in place and recipe is enabled
-                    (recipe.is_enabled() and not regenerate_recipes_slugs)
-                    # regenerate restriction is in place and recipe is included
-                    or (
-                        regenerate_recipes_slugs
-                        and recipe.slug in regenerate_recipes_slugs
-                    )
-                    # not cached (so that we always have a copy available)
-                    or not cached_files
-                ):
-                    original_recipe_timeout = recipe.timeout
-                    for attempt in range(recipe.retry_attempts + 1):
-                        try:
-                            # run recipe
-                            exit_code = subprocess.call(
-                                cmd,
-                                timeout=recipe.timeout,
-                                stdout=sys.stdout,
-                                stderr=sys.stderr,
-                            )
-                            break
-                        except subprocess.TimeoutExpired:
-                            if attempt < recipe.retry_attempts:
-                                recipe_elapsed_time = timedelta(
-                                    seconds=timer() - recipe_start_time
-                                )
-                                wait_interval = ceil(recipe.timeout / 100)
-                                logger.warning(
-                                    f"TimeoutExpired fetching '{recipe.name}' "
-                                    f"after {humanize.precisedelta(recipe_elapsed_time)}. "
-                                    f"Retrying after {wait_interval}s..."
-                                )
-                                # increase recipe timeout by 10% on retry but up to a max of 20min
-                                recipe.timeout = max(int(1.1 * recipe.timeout), 20 * 60)
-                                time.sleep(max(min(wait_interval, 2), 10))
-                                continue
-                            raise
-                        finally:
-                            # it's not used anymore, but restore original timeout
-                            # value just in case
-                            recipe.timeout = original_recipe_timeout
-
-                    job_log[recipe.slug] = time.time()
-
-                else:
-                    # use cache
-                    logger.warning(f'Using cached copy for "{recipe.name}".')
-                    abort_recipe = _download_from_cache(
-                        recipe, cached, publish_site, cache_sess
-                    )
-                    if not abort_recipe:
-                        job_status = ":outbox_tray: From cache"
-                    else:
-                        recipe_elapsed_time = timedelta(
-                            seconds=timer() - recipe_start_time
-                        )
-                        logger.info(
-                            f'{"=" * 10} "{recipe.name}" recipe took {humanize.precisedelta(recipe_elapsed_time)} {"=" * 20}'
-                        )
-                        logger.info("::endgroup::")
-                        job_summary += _add_recipe_summary(
-                            recipe, ":x: Cache Timeout", recipe_elapsed_time
-                        )
-                        continue
-
-            except subprocess.TimeoutExpired:
-                logger.exception(f"[!] TimeoutExpired fetching '{recipe.name}'")
-                recipe_elapsed_time = timedelta(seconds=timer() - recipe_start_time)
-                logger.info(
-                    f'{"=" * 10} "{recipe.name}" recipe took {humanize.precisedelta(recipe_elapsed_time)} {"=" * 20}'
-                )
-                logger.info("::endgroup::")
-                job_summary += _add_recipe_summary(
-                    recipe, ":x: Convert Timeout", recipe_elapsed_time
-                )
-                continue
-        else:
-            job_status = ":file_folder: From local"
-
-        # unset debug folder
-        if os.environ.get("recipe_debug_folder", ""):
-            del os.environ["recipe_debug_folder"]
-
-        source_file_paths = sorted(
-            _find_output(publish_folder, recipe.slug, recipe.src_ext)
+    try:
+        run_results.update(
+            _execute_recipes(queued, ctx, jobs, jobs_per_group, convert_jobs)
         )
-        if cached_files and not source_file_paths:
-            logger.warning(
-                f'Using cached copy for "{recipe.name}" because recipe has no output.'
-            )
-            # try to use cached copy if recipe does not have output
-            # for example FT(Print) has no weekend issue, so we'll try to keep the last issue
-            _ = _download_from_cache(recipe, cached, publish_site, cache_sess)
-            source_file_paths = sorted(
-                _find_output(publish_folder, recipe.slug, recipe.src_ext)
-            )
-            if source_file_paths:
-                exit_code = (
-                    0  # reset exit_code (not 0 because of failed recipe ebook-convert)
-                )
-                job_status = ":outbox_tray: From cache"
-
-        if not source_file_paths:
-            logger.error(
-                f"Unable to find source generated: '/{recipe.slug}*.{recipe.src_ext}'"
-            )
-            recipe_elapsed_time = timedelta(seconds=timer() - recipe_start_time)
-            logger.info(
-                f'{"=" * 20} "{recipe.name}" recipe took {humanize.precisedelta(recipe_elapsed_time)} {"=" * 20}'
-            )
-            logger.info("::endgroup::")
-            job_summary += _add_recipe_summary(
-                recipe, ":x: No output", recipe_elapsed_time
-            )
+    finally:
+        shutil.rmtree(ctx.article_store_folder, ignore_errors=True)
+
+    # merge results in the recipes order so that the outputs are deterministic
+    for pos in sorted(run_results.keys()):
+        run_result = run_results[pos]
+        recipe = run_result.recipe
+        job_summary += run_result.summary
+        if run_result.outputs is None:
+            # skipped
             continue
-
-        source_file_path = source_file_paths[-1]
-        source_file_name = Path(source_file_path.name)
-        if not exit_code:
-            logger.debug(f'Get book meta info for "{source_file_path}"')
-            proc = subprocess.Popen(
-                ["ebook-meta", str(source_file_path)], stdout=subprocess.PIPE
-            )
-            meta_out = proc.stdout.read().decode("utf-8")  # type: ignore
-            mobj = re.search(
-                r"Published\s+:\s(?P<pub_date>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})",
-                meta_out,
-            )
-            pub_date = today
-            if mobj:
-                pub_date = datetime.strptime(
-                    mobj.group("pub_date"), "%Y-%m-%dT%H:%M:%S"
-                ).replace(tzinfo=timezone.utc)
-            title = ""
-            mobj = re.search(r"Title\s+:\s(?P<title>.+)", meta_out)
-            if mobj:
-                title = mobj.group("title")
-            rename_file_name = Path(
-                f"{recipe.slug}-{pub_date:%Y-%m-%d}.{recipe.src_ext}"
-            )
-
-            comments = []
-            description = ""
-            mobj = re.search(r"Comments\s+:\s(?P<comments>.+)", meta_out, re.DOTALL)
-            if mobj:
-                try:
-                    comments = [
-                        c.strip()
-                        for c in mobj.group("comments").split("\n")
-                        if c.strip()
-                    ]
-                    description = (
-                        f"{comments[0]}"
-                        f'<ul><li>{"</li><li>".join(comments[1:-1])}</li></ul>'
-                        f"{linkify(comments[-1], callbacks=[_linkify_attrs])}"
-                    )
-                except:  # noqa, pylint: disable=bare-except
-                    pass
-
-            generated[recipe.category][recipe.name].append(
-                RecipeOutput(
-                    recipe=recipe,
-                    title=title,
-                    file=source_file_name,
-                    rename_to=rename_file_name,
-                    published_dt=pub_date,
-                    description=description,
-                    articles=comments[1:-1],
-                )
-            )
-
-            pseudo_series_index = pub_date.year * 1000 + pub_date.timetuple().tm_yday
-            # (rename_file_name != source_file_name) checks that it is a newly generated file
-            # so that we don't regenerate the cover needlessly
-            if (
-                recipe.overwrite_cover
-                and title
-                and rename_file_name != source_file_name
-            ):
-                # customise cover
-                logger.debug(f'Setting cover for "{source_file_path}"')
-                try:
-                    cover_file_path = Path(f"{str(source_file_path)}.png")
-                    generate_cover(
-                        cover_file_path, title, recipe.cover_options, logger=logger
-                    )
-                    cover_cmd = [
-                        "ebook-meta",
-                        str(source_file_path),
-                        f"--cover={str(cover_file_path)}",
-                        f"--series={recipe.name}",
-                        f"--index={pseudo_series_index}",
-                        f"--publisher={publish_site}",
-                    ]
-                    _ = subprocess.call(cover_cmd, stdout=subprocess.PIPE)
-                    cover_file_path.unlink()
-                except Exception:  # noqa, pylint: disable=broad-except
-                    logger.exception("Error generating cover")
-            elif rename_file_name != source_file_name:
-                # just set series name
-                series_cmd = [
-                    "ebook-meta",
-                    str(source_file_path),
-                    f"--series={recipe.name}",
-                    f"--index={pseudo_series_index}",
-                    f"--publisher={publish_site}",
-                ]
-                _ = subprocess.call(series_cmd, stdout=subprocess.PIPE)
-
-            index[recipe.slug].append(
-                {
-                    "filename": f"{recipe.slug}-{pub_date:%Y-%m-%d}.{recipe.src_ext}",
-                    "published": pub_date.timestamp(),
-                }
-            )
-
-            # convert generate book into alternative formats
-            for ext in recipe.target_ext:
-                target_file_name = Path(f"{recipe.slug}.{ext}")
-                target_file_path = Path(publish_folder, target_file_name)
-
-                cmd = [
-                    "ebook-convert",
-                    str(source_file_path),
-                    str(target_file_path),
-                    f"--series={recipe.name}",
-                    f"--series-index={pseudo_series_index}",
-                    f"--publisher={publish_site}",
-                ]
-                if recipe.conv_options and recipe.conv_options.get(ext):
-                    cmd.extend(recipe.conv_options[ext])
-
-                customised_css_filename = Path("static", f"{ext}.css")
-                if customised_css_filename.exists():
-                    cmd.append(f"--extra-css={str(customised_css_filename)}")
-                if verbose_mode:
-                    cmd.append("-vv")
-                if not _find_output(publish_folder, recipe.slug, ext):
-                    exit_code = subprocess.call(
-                        cmd,
-                        timeout=recipe.timeout,
-                        stdout=sys.stdout,
-                        stderr=sys.stderr,
-                    )
-
-                if not exit_code:
-                    target_file_path = sorted(
-                        _find_output(publish_folder, recipe.slug, ext)
-                    )[-1]
-                    target_file_name = Path(target_file_path.name)
-
-                    generated[recipe.category][recipe.name].append(
-                        RecipeOutput(
-                            recipe=recipe,
-                            title=title,
-                            file=target_file_name,
-                            rename_to=f"{recipe.slug}-{pub_date:%Y-%m-%d}.{ext}",
-                            published_dt=pub_date,
-                            description=comments,
-                            articles=comments[1:-1],
-                        )
-                    )
-                    index[recipe.slug].append(
-                        {
-                            "filename": f"{recipe.slug}-{pub_date:%Y-%m-%d}.{ext}",
-                            "published": pub_date.timestamp(),
-                        }
-                    )
-
-            recipe_elapsed_time = timedelta(seconds=timer() - recipe_start_time)
-            logger.info(
-                f'{"=" * 20} "{recipe.name}" recipe took {humanize.precisedelta(recipe_elapsed_time)} {"=" * 20}'
-            )
-            logger.info("::endgroup::")
-            job_summary += _add_recipe_summary(
-                recipe,
-                job_status or ":white_check_mark: Completed",
-                recipe_elapsed_time,
-            )
+        if recipe.category not in generated:
+            generated[recipe.category] = {}
+        generated[recipe.category][recipe.name] = run_result.outputs
+        index[recipe.slug] = run_result.index
+        if run_result.last_run:
+            job_log[recipe.slug].last_run = run_result.last_run
+        if run_result.stats:
+            job_log[recipe.slug].add(run_result.stats)
 
     static_assets_start_time = timer()
     # generate index.html
-    lunr_documents = []
-    listing = ""
-    for _, (category, publications) in enumerate(
-        sorted(generated.items(), key=sort_category_key)
-    ):
-        generated_items = [(k, v) for k, v in publications.items() if v]
-        publication_listing = []
-        for recipe_name, books in sorted(
-            generated_items, key=lambda item: item[1][0].published_dt, reverse=True
+    # covers are extracted in the background while the listing is generated
+    cover_executor = ThreadPoolExecutor(thread_name_prefix="cover")
+    cover_futures: List[Future] = []
+    cover_candidates: List[Tuple[str, Path, Path]] = []
+    # a recipe's books share the same cover file, only extract it once
+    submitted_cover_paths: Set[Path] = set()
+    with ctx.tracer.span("listing"):
+        lunr_documents = []
+        listing = ""
+        for _, (category, publications) in enumerate(
+            sorted(generated.items(), key=sort_category_key)
         ):
-            lunr_documents.append(
-                {
-                    "id": books[0].recipe.slug,
-                    "title": books[0].title or recipe_name,
-                    "articles": "<li>" + "</li><li>".join(books[0].articles) + "</li>",
-                    "tags": " ".join(books[0].recipe.tags),
-                    "category": books[0].recipe.category,
-                }
-            )
-            book_links = []
-            for book in books:
-                # change filename to datestamped name
-                book_file = publish_folder.joinpath(book.file)
-                book_rename_to = publish_folder.joinpath(book.rename_to)
-                if book.file != book.rename_to:
-                    book_file.rename(book_rename_to)
-                cover_file_name = Path(f"{book_rename_to.stem}.jpg")
-                cover_file_path = publish_folder.joinpath(cover_file_name)
-                cover_thumbnail_file_name = Path(f"{book_rename_to.stem}.thumb.jpg")
-                cover_thumbnail_file_path = publish_folder.joinpath(
-                    cover_thumbnail_file_name
+            generated_items = [(k, v) for k, v in publications.items() if v]
+            publication_listing = []
+            for recipe_name, books in sorted(
+                generated_items, key=lambda item: item[1][0].published_dt, reverse=True
+            ):
+                lunr_documents.append(
+                    {
+                        "id": books[0].recipe.slug,
+                        "title": books[0].title or recipe_name,
+                        "articles": "<li>"
+                        + "</li><li>".join(books[0].articles)
+                        + "</li>",
+                        "tags": " ".join(books[0].recipe.tags),
+                        "category": books[0].recipe.category,
+                    }
                 )
-                if (not book.recipe.overwrite_cover) and (not cover_file_path.exists()):
-                    # only extract default cover not generated by newsrack
-                    cover_get_cmd = [
-                        "ebook-meta",
-                        f"--get-cover={str(cover_file_path)}",
-                        str(book_rename_to),
-                    ]
-                    try:
-                        _ = subprocess.call(cover_get_cmd, stdout=subprocess.PIPE)
-                        temp_cover_file_name = Path(f"{book_rename_to.stem}.temp.jpg")
-                        temp_cover_file_path = publish_folder.joinpath(
-                            temp_cover_file_name
-                        )
-                        imagemagick_cmd = [
-                            "convert",
-                            str(cover_file_path),
-                            "-quality",
-                            "70",
-                            "-resize",
-                            "1024x1024>",
-                            "-unsharp",
-                            "0x.5",
-                            "-strip",
-                            str(temp_cover_file_path),
-                        ]
-                        exit_code = subprocess.call(imagemagick_cmd)
-                        if exit_code:
-                            logger.warning(
-                                "convert exited with the code: {0!s}".format(exit_code)
-                            )
-                        else:
-                            temp_cover_file_path.rename(cover_file_path)
-                        imagemagick_cmd = [
-                            "convert",
-                            str(cover_file_path),
-                            "-quality",
-                            "80",
-                            "-thumbnail",
-                            "500x500>",
-                            "-unsharp",
-                            "0x.5",
-                            str(cover_thumbnail_file_path),
-                        ]
-                        exit_code = subprocess.call(imagemagick_cmd)
-                        if exit_code:
-                            logger.warning(
-                                "convert (thumbnail) exited with the code: {0!s}".format(
-                                    exit_code
+                book_links = []
+                for book in books:
+                    # change filename to datestamped name
+                    book_file = publish_folder.joinpath(book.file)
+                    book_rename_to = publish_folder.joinpath(book.rename_to)
+                    if book.file != book.rename_to:
+                        ctx.outputs.rename(book_file, book_rename_to)
+                    cover_file_name = Path(f"{book_rename_to.stem}.jpg")
+                    cover_file_path = publish_folder.joinpath(cover_file_name)
+                    cover_thumbnail_file_name = Path(f"{book_rename_to.stem}.thumb.jpg")
+                    cover_thumbnail_file_path = publish_folder.joinpath(
+                        cover_thumbnail_file_name
+                    )
+                    if not book.recipe.overwrite_cover:
+                        if (
+                            not cover_file_path.exists()
+                            and cover_file_path not in submitted_cover_paths
+                        ):
+                            # only extract default cover not generated by newsrack
+                            submitted_cover_paths.add(cover_file_path)
+                            cover_futures.append(
+                                cover_executor.submit(
+                                    _extract_cover,
+                                    book_rename_to,
+                                    cover_file_path,
+                                    cover_thumbnail_file_path,
+                                    ctx,
                                 )
                             )
-                    except (
-                        Exception  # noqa, pylint: disable=broad-except
-                    ) as get_cover_err:
-                        logger.warning(
-                            "Unable to extract cover for %s: %s",
-                            book.rename_to,
-                            str(get_cover_err),
+                        cover_candidates.append(
+                            (
+                                book.recipe.slug,
+                                cover_file_name,
+                                cover_thumbnail_file_name,
+                            )
                         )
-                if (not book.recipe.overwrite_cover) and cover_file_path.exists():
-                    recipe_covers[book.recipe.slug] = {
-                        "cover": str(cover_file_name),
-                        "thumbnail": str(cover_thumbnail_file_name),
-                    }
 
-                file_size = book_rename_to.stat().st_size
-                book_ext = book_file.suffix
-                reader_link = ""
-                if book_ext == ".epub":
-                    reader_link = (
-                        f'<a class="reader not-for-kindle" title="Read in browser" '
-                        f'href="reader.html?{urlencode({"file": book.rename_to, "id": books[0].recipe.slug})}">'
-                        f'<svg><use href="reader_sprites.svg#icon-book"></use></svg></a>'
+                    file_size = book_rename_to.stat().st_size
+                    book_ext = book_file.suffix
+                    reader_link = ""
+                    if book_ext == ".epub":
+                        reader_link = (
+                            f'<a class="reader not-for-kindle" title="Read in browser" '
+                            f'href="reader.html?{urlencode({"file": book.rename_to, "id": books[0].recipe.slug})}">'
+                            f'<svg><use href="reader_sprites.svg#icon-book"></use></svg></a>'
+                        )
+                    book_links.append(
+                        f'<div class="book">'
+                        f'<a title="Download {book_ext[1:]}" href="{book.rename_to}">{book_ext}<span class="file-size">{humanize.naturalsize(file_size).replace(" ", "")}</span>'
+                        f"</a>{reader_link}"
+                        f"</div>"
                     )
-                book_links.append(
-                    f'<div class="book">'
-                    f'<a title="Download {book_ext[1:]}" href="{book.rename_to}">{book_ext}<span class="file-size">{humanize.naturalsize(file_size).replace(" ", "")}</span>'
-                    f"</a>{reader_link}"
-                    f"</div>"
+                tags_html = (
+                    ""
+                    if not books[0].recipe.tags
+                    else '<div class="tags"><span tabindex="0" title="Search with this tag" class="tag">#'
+                    + '</span><span tabindex="0" title="Search with this tag" class="tag">#'.join(
+                        books[0].recipe.tags
+                    )
+                    + "</span></div>"
                 )
-            tags_html = (
-                ""
-                if not books[0].recipe.tags
-                else '<div class="tags"><span tabindex="0" title="Search with this tag" class="tag">#'
-                + '</span><span tabindex="0" title="Search with this tag" class="tag">#'.join(
-                    books[0].recipe.tags
+                publication_listing.append(
+                    f"""
+                <li id="{books[0].recipe.slug}" data-cat-id="cat-{slugify(category, True)}" data-cat-name="{category}">
+                <span class="title">{books[0].title or recipe_name}</span>
+                {" ".join(book_links)}
+                <div class="meta" data-pub-id="{books[0].recipe.slug}">
+                <div tabindex="0" class="pub-date" data-pub-date="{int(books[0].published_dt.timestamp() * 1000)}">
+                    Published at {books[0].published_dt:%Y-%m-%d %-I:%M%p %z}
+                </div>
+                {tags_html}
+                </div>
+                <div class="contents hide"></div>
+                </li>"""
+                )
+                recipe_descriptions[books[0].recipe.slug] = books[0].description
+
+            # display recipes without output
+            generated_recipe_names = [recipe_name for recipe_name, _ in generated_items]
+            unsuccessful_category_recipes = [
+                r
+                for r in recipes
+                if r.category == category
+                and r.name
+                and r.name not in generated_recipe_names
+            ]
+            for r in unsuccessful_category_recipes:
+                publication_listing.append(
+                    f"""<li id="{r.slug}" data-cat-id="cat-{slugify(r.category, True)}" data-cat-name="{r.category}" class="not-available" data-tags="{"" if not r.tags else "#" + " #".join(r.tags)}">
+                    <span class="title">{r.name}</span>
+                    <div class="meta" data-pub-id="{r.slug}">
+                    <div class="pub-date">Not available
+                        <span class="tags">{"" if not r.tags else "#" + " #".join(r.tags)}</span>
+                    </div></div></li>"""
                 )
-                + "</span></div>"
-            )
-            publication_listing.append(
-                f"""
-            <li id="{books[0].recipe.slug}" data-cat-id="cat-{slugify(category, True)}" data-cat-name="{category}">
-            <span class="title">{books[0].title or recipe_name}</span>
-            {" ".join(book_links)}
-            <div class="meta" data-pub-id="{books[0].recipe.slug}">
-            <div tabindex="0" class="pub-date" data-pub-date="{int(books[0].published_dt.timestamp() * 1000)}">
-                Published at {books[0].published_dt:%Y-%m-%d %-I:%M%p %z}
-            </div>
-            {tags_html}
-            </div>
-            <div class="contents hide"></div>
-            </li>"""
-            )
-            recipe_descriptions[books[0].recipe.slug] = books[0].description
-
-        # display recipes without output
-        generated_recipe_names = [recipe_name for recipe_name, _ in generated_items]
-        unsuccessful_category_recipes = [
-            r
-            for r in recipes
-            if r.category == category
-            and r.name
-            and r.name not in generated_recipe_names
-        ]
-        for r in unsuccessful_category_recipes:
-            publication_listing.append(
-                f"""<li id="{r.slug}" data-cat-id="cat-{slugify(r.category, True)}" data-cat-name="{r.category}" class="not-available" data-tags="{"" if not r.tags else "#" + " #".join(r.tags)}">
-                <span class="title">{r.name}</span>
-                <div class="meta" data-pub-id="{r.slug}">
-                <div class="pub-date">Not available
-                    <span class="tags">{"" if not r.tags else "#" + " #".join(r.tags)}</span>
-                </div></div></li>"""
-            )
 
-        listing += f"""<div class="category-container is-open"><h2 tabindex="0" id="cat-{slugify(category, True)}" class="category is-open">{category}
-        <a class="opds" title="OPDS for {category.title()}" href="{slugify(category, True)}.xml">OPDS</a></h2>
-        <ol class="books">{"".join(publication_listing)}</ol>
-        <div class="close-cat-container"><div tabindex="0" class="close-cat-shortcut" title="Collapse category" data-click-target="cat-{slugify(category)}"></div></div>
-        </div>
-        """
+            listing += f"""<div class="category-container is-open"><h2 tabindex="0" id="cat-{slugify(category, True)}" class="category is-open">{category}
+            <a class="opds" title="OPDS for {category.title()}" href="{slugify(category, True)}.xml">OPDS</a></h2>
+            <ol class="books">{"".join(publication_listing)}</ol>
+            <div class="close-cat-container"><div tabindex="0" class="close-cat-shortcut" title="Collapse category" data-click-target="cat-{slugify(category)}"></div></div>
+            </div>
+            """
+
+    with ctx.tracer.span("covers"):
+        wait(cover_futures)
+        cover_executor.shutdown()
+    for recipe_slug, cover_file_name, cover_thumbnail_file_name in cover_candidates:
+        if (
+            publish_folder.joinpath(cover_file_name).exists()
+            and publish_folder.joinpath(cover_thumbnail_file_name).exists()
+        ):
+            recipe_covers[recipe_slug] = {
+                "cover": str(cover_file_name),
+                "thumbnail": str(cover_thumbnail_file_name),
+            }
 
-    with publish_folder.joinpath(lunr_docs_json_filename).open(
-        "w", encoding="utf-8"
-    ) as f_lunr_index:
+    with (
+        ctx.tracer.span("lunr docs"),
+        publish_folder.joinpath(lunr_docs_json_filename).open(
+            "w", encoding="utf-8"
+        ) as f_lunr_index,
+    ):
         json.dump(lunr_documents, f_lunr_index)
 
     with publish_folder.joinpath(index_json_filename).open(
@@ -958,8 +1650,8 @@ def run(
 
     if not meta_folder.exists():
         meta_folder.mkdir(parents=True, exist_ok=True)
-    with meta_folder.joinpath(job_log_filename).open("w", encoding="utf-8") as f:
-        json.dump(job_log, f, indent=0)
+    save_job_log(meta_folder.joinpath(job_log_filename), job_log)
+    ctx.build_cache.prune()
 
     site_css = "static/site.css"
     if os.path.exists("static/custom.css"):
@@ -973,6 +1665,7 @@ def run(
     theme_js = "static/theme.compiled.js"
 
     with (
+        ctx.tracer.span("index.html"),
         open(site_css, "r", encoding="utf-8") as f_site_css,
         open(site_js, "r", encoding="utf-8") as f_site_js,
         open(theme_js, "r", encoding="utf-8") as f_theme_js,
@@ -1004,6 +1697,7 @@ def run(
     if os.path.exists("static/reader_custom.js"):
         reader_js = "static/reader_custom.js"
     with (
+        ctx.tracer.span("reader.html"),
         open(reader_js, "r", encoding="utf-8") as f_reader_js,
         open(theme_js, "r", encoding="utf-8") as f_theme_js,
         open("static/reader.css", "r", encoding="utf-8") as f_reader_css,
@@ -1017,7 +1711,12 @@ def run(
         )
         f_out.write(html_output)
 
-    _write_opds(generated, recipe_covers, publish_site)
+    with ctx.tracer.span("opds"):
+        _write_opds(generated, recipe_covers, publish_site)
+
+    if ctx.calibre_workers:
+        ctx.calibre_workers.stop()
+    ctx.tracer.save(meta_folder.joinpath(trace_filename))
 
     static_assets_elapsed_time = timedelta(seconds=timer() - static_assets_start_time)
 
@@ -1042,6 +1741,35 @@ if __name__ == "__main__":
         action="store_true",
         help="Enable more verbose messages for debugging",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=0,
+        help="Number of recipes to run concurrently",
+    )
+    parser.add_argument(
+        "--jobs-per-group",
+        dest="jobs_per_group",
+        type=int,
+        default=0,
+        help="Number of recipes with the same concurrency key to run concurrently",
+    )
+    parser.add_argument(
+        "--convert-jobs",
+        dest="convert_jobs",
+        type=int,
+        default=None,
+        help="Number of recipes to convert concurrently while fetching, 0 to disable. "
+        "Defaults to 1 if more than 1 job is used, else 0",
+    )
+    parser.add_argument(
+        "--no-calibre-worker",
+        dest="use_calibre_worker",
+        action="store_false",
+        help="Run each ebook-convert/ebook-meta command in a new process",
+    )
     args = parser.parse_args()
 
     try:
@@ -1053,6 +1781,27 @@ if __name__ == "__main__":
     if verbose:
         logger.setLevel(logging.DEBUG)
 
+    try:
+        jobs = int(os.environ["jobs"])
+    except (KeyError, ValueError):
+        jobs = 1
+    jobs = args.jobs or jobs
+
+    try:
+        jobs_per_group = int(os.environ["jobs_per_group"])
+    except (KeyError, ValueError):
+        jobs_per_group = 1
+    jobs_per_group = max(1, args.jobs_per_group or jobs_per_group)
+
+    try:
+        convert_jobs = int(os.environ["convert_jobs"])
+    except (KeyError, ValueError):
+        # only pipeline conversions by default when fetching concurrently,
+        # so that a sequential run keeps its live output
+        convert_jobs = 1 if jobs > 1 else 0
+    if args.convert_jobs is not None:
+        convert_jobs = args.convert_jobs
+
     run(
         args.publish_site,
         args.repo_url,
@@ -1061,4 +1810,8 @@ if __name__ == "__main__":
         args.run_id,
         args.run_url,
         verbose,
+        jobs,
+        jobs_per_group,
+        convert_jobs,
+        args.use_calibre_worker,
     )
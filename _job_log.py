@@ -0,0 +1,104 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# Per recipe run history, persisted in meta/job_log.json
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from math import ceil
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional
+
+from _recipe_utils import default_recipe_timeout
+
+# number of runs kept per recipe
+max_history = 10
+# bounds for timeouts derived from the run history, never shorter than the default
+min_seeded_timeout = default_recipe_timeout
+max_seeded_timeout = 20 * 60
+
+
+@dataclass
+class RecipeRunStats:
+    started: float  # unix timestamp
+    duration: float  # seconds, fetch and conversion
+    outcome: str
+    fetch_duration: Optional[float] = None  # seconds, None if the recipe was not run
+    retries: int = 0
+    size: int = 0  # total size of outputs in bytes
+
+
+@dataclass
+class RecipeHistory:
+    last_run: float = 0  # last run unix timestamp
+    runs: List[RecipeRunStats] = field(default_factory=list)
+
+    def add(self, stats: RecipeRunStats) -> None:
+        self.runs = (self.runs + [stats])[-max_history:]
+
+    def expected_duration(self, fetch: bool) -> Optional[float]:
+        """
+        Estimate how long the next run will take
+
+        :param fetch: True if the recipe is expected to be run, else restored from cache
+        :return: None if there is no history
+        """
+        fetched = [r.duration for r in self.runs if r.fetch_duration is not None]
+        not_fetched = [r.duration for r in self.runs if r.fetch_duration is None]
+        durations = (fetched or not_fetched) if fetch else (not_fetched or fetched)
+        return median(durations) if durations else None
+
+    def seeded_timeout(self) -> Optional[int]:
+        """
+        A recipe timeout based on observed fetch durations
+
+        :return: None if there is no history
+        """
+        fetch_durations = [
+            r.fetch_duration for r in self.runs if r.fetch_duration is not None
+        ]
+        if not fetch_durations:
+            return None
+        return min(
+            max(ceil(2 * max(fetch_durations)), min_seeded_timeout),
+            max_seeded_timeout,
+        )
+
+
+def outcome_from_status(status: str) -> str:
+    """
+    Strip the emoji from a job summary status, e.g. ":x: No output" -> "No output"
+
+    :param status:
+    :return:
+    """
+    return re.sub(r"^(:[a-z_]+:\s*)+", "", status).strip()
+
+
+def load_job_log(file_path: Path) -> Dict[str, RecipeHistory]:
+    """
+    Load the job log. Older job logs only have the last run timestamp per recipe.
+
+    :param file_path:
+    :return:
+    """
+    with file_path.open("r", encoding="utf-8") as f:
+        job_log_json = json.load(f)
+    job_log: Dict[str, RecipeHistory] = {}
+    for slug, entry in job_log_json.items():
+        if isinstance(entry, (int, float)):
+            job_log[slug] = RecipeHistory(last_run=entry)
+            continue
+        job_log[slug] = RecipeHistory(
+            last_run=entry.get("last_run", 0),
+            runs=[RecipeRunStats(**r) for r in entry.get("runs", [])],
+        )
+    return job_log
+
+
+def save_job_log(file_path: Path, job_log: Dict[str, RecipeHistory]) -> None:
+    with file_path.open("w", encoding="utf-8") as f:
+        json.dump({slug: asdict(h) for slug, h in job_log.items()}, f, indent=0)
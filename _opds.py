@@ -4,9 +4,11 @@
 # https://opensource.org/licenses/GPL-3.0
 
 # Helpers to generate opds xml - extremely minimal
+from collections import namedtuple
 from datetime import datetime
-from typing import Dict, Optional
-from xml.dom import minidom
+from typing import IO, Dict, List, Optional
+from xml.sax.saxutils import XMLGenerator
+from xml.sax.xmlreader import AttributesImpl
 
 extension_contenttype_map = {
     ".epub": "application/epub+zip",
@@ -16,40 +18,74 @@ extension_contenttype_map = {
     ".pdf": "application/pdf",
 }
 
+# An xml element that is built once and can be written to multiple feeds
+Tag = namedtuple("Tag", ["tag", "value", "attributes", "children"])
+
 
 def simple_tag(
-    doc_root: minidom.Document,
     tag: str,
     value: Optional[str] = None,
     attributes: Optional[Dict] = None,
-) -> minidom.Element:
-    new_tag = doc_root.createElement(tag)
-    if value:
-        new_tag.appendChild(doc_root.createTextNode(value))
-    if attributes:
-        for k, v in attributes.items():
-            new_tag.setAttribute(k, v)
-    return new_tag
-
-
-def init_feed(
-    doc: minidom.Document, publish_site: str, feed_id: str, title: str
-) -> minidom.Element:
-    feed = simple_tag(
-        doc,
-        "feed",
-        attributes={
-            "xmlns": "http://www.w3.org/2005/Atom",
-            "xmlns:dc": "http://purl.org/dc/terms/",
-            "xmlns:opds": "http://opds-spec.org/2010/catalog",
-        },
-    )
-    doc.appendChild(feed)
-    feed.appendChild(simple_tag(doc, "id", feed_id))
-    feed.appendChild(simple_tag(doc, "title", title))
-    feed.appendChild(simple_tag(doc, "updated", f"{datetime.now():%Y-%m-%dT%H:%M:%SZ}"))
-    feed_author = doc.createElement("author")
-    feed_author.appendChild(simple_tag(doc, "name", publish_site))
-    feed_author.appendChild(simple_tag(doc, "uri", publish_site))
-    feed.appendChild(feed_author)
-    return feed
+    children: Optional[List[Tag]] = None,
+) -> Tag:
+    return Tag(tag, value, attributes or {}, children or [])
+
+
+class FeedWriter:
+    """Writes an OPDS feed incrementally to a stream"""
+
+    def __init__(self, out: IO[bytes], publish_site: str, feed_id: str, title: str):
+        self.xml = XMLGenerator(out, encoding="utf-8", short_empty_elements=True)
+        self.xml.startDocument()
+        self.xml.processingInstruction(
+            "xml-stylesheet", 'type="text/xsl" href="opds.xsl"'
+        )
+        self.xml.ignorableWhitespace("\n")
+        self.xml.startElement(
+            "feed",
+            AttributesImpl(
+                {
+                    "xmlns": "http://www.w3.org/2005/Atom",
+                    "xmlns:dc": "http://purl.org/dc/terms/",
+                    "xmlns:opds": "http://opds-spec.org/2010/catalog",
+                }
+            ),
+        )
+        self.xml.ignorableWhitespace("\n")
+        self.write(simple_tag("id", feed_id))
+        self.write(simple_tag("title", title))
+        self.write(simple_tag("updated", f"{datetime.now():%Y-%m-%dT%H:%M:%SZ}"))
+        self.write(
+            simple_tag(
+                "author",
+                children=[
+                    simple_tag("name", publish_site),
+                    simple_tag("uri", publish_site),
+                ],
+            )
+        )
+
+    def _write_tag(self, tag: Tag) -> None:
+        self.xml.startElement(tag.tag, AttributesImpl(tag.attributes))
+        if tag.children:
+            self.xml.ignorableWhitespace("\n")
+            for child in tag.children:
+                self._write_tag(child)
+        if tag.value:
+            self.xml.characters(tag.value)
+        self.xml.endElement(tag.tag)
+        self.xml.ignorableWhitespace("\n")
+
+    def write(self, tag: Tag) -> None:
+        """
+        Write an element into the feed
+
+        :param tag:
+        :return:
+        """
+        self._write_tag(tag)
+
+    def close(self) -> None:
+        self.xml.endElement("feed")
+        self.xml.ignorableWhitespace("\n")
+        self.xml.endDocument()
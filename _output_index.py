@@ -0,0 +1,99 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# An in-memory index of the files in the publish folder so that outputs
+# can be looked up without globbing the folder every time
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import DefaultDict, List, Optional, Set, Tuple
+
+# {slug}.{ext} or {slug}-{yyyy-mm-dd}.{ext}
+output_name_re = re.compile(r"^(?P<slug>.+?)(-\d{4}-\d{2}-\d{2})?\.(?P<ext>[^.]+)$")
+
+
+def _output_key(file_name: str) -> Optional[Tuple[str, str]]:
+    match = output_name_re.match(file_name)
+    if not match:
+        return None
+    return match.group("slug"), match.group("ext")
+
+
+class OutputIndex:
+    """Files in the publish folder, keyed by slug and extension"""
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.files: DefaultDict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self.lock = threading.Lock()
+        self.scan()
+
+    def scan(self) -> None:
+        """
+        (Re)build the index from the folder contents
+
+        :return:
+        """
+        files: DefaultDict[Tuple[str, str], Set[str]] = defaultdict(set)
+        if self.folder.exists():
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    key = _output_key(entry.name)
+                    if key and entry.is_file():
+                        files[key].add(entry.name)
+        with self.lock:
+            self.files = files
+
+    def add(self, file_path: Path) -> None:
+        key = _output_key(file_path.name)
+        if key:
+            with self.lock:
+                self.files[key].add(file_path.name)
+
+    def remove(self, file_path: Path) -> None:
+        key = _output_key(file_path.name)
+        if key:
+            with self.lock:
+                self.files[key].discard(file_path.name)
+
+    def refresh(self, file_path: Path) -> None:
+        """
+        Update the index for a file that may have been written or deleted
+        by something else, e.g. calibre
+
+        :param file_path:
+        :return:
+        """
+        if file_path.is_file():
+            self.add(file_path)
+        else:
+            self.remove(file_path)
+
+    def rename(self, src: Path, dest: Path) -> None:
+        """
+        Rename a file in the folder and update the index
+
+        :param src:
+        :param dest:
+        :return:
+        """
+        src.rename(dest)
+        self.remove(src)
+        self.add(dest)
+
+    def find(self, slug: str, ext: str) -> List[Path]:
+        """
+        Find the outputs for a recipe by its exact slug, e.g. "wsj" will not
+        match "wsj-print" outputs.
+
+        :param slug:
+        :param ext:
+        :return: Sorted list of matching files
+        """
+        with self.lock:
+            file_names = sorted(self.files.get((slug, ext), ()))
+        return [self.folder.joinpath(file_name) for file_name in file_names]
@@ -6,7 +6,7 @@ import sys
 from calendar import monthrange
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Dict, List, Union
+from typing import Callable, Dict, List, Optional, Union
 
 # adapted from calibre.constants.iswindows
 _plat = sys.platform.lower()
@@ -56,7 +56,7 @@ class Recipe:
     target_ext: List[str] = field(
         default_factory=list
     )  # alt formats that src_ext will be converted to
-    timeout: int = default_recipe_timeout  # max time allowed for executing the recipe
+    timeout: Optional[int] = None  # max time allowed for executing the recipe
     overwrite_cover: bool = True  # generate a plain cover to overwrite calibre's
     last_run: float = 0  # last run unix timestamp
     enable_on: Union[
@@ -78,12 +78,17 @@ class Recipe:
     recipe_datetime_format: str = (
         "%I:%M%p, %-d %b, %Y" if is_windows else "%-I:%M%p, %-d %b, %Y"
     )  # used to format a datetime in the recipe
+    concurrency_key: str = ""  # recipes with the same key, e.g. publisher host, are limited from running concurrently
 
     def is_enabled(self) -> bool:
         if callable(self.enable_on):
             return self.enable_on(self)
         return self.enable_on
 
+    def get_concurrency_key(self) -> str:
+        # recipes without a concurrency_key are in a group of their own
+        return self.concurrency_key or self.slug
+
 
 def sort_category(a: str, b: str, categories_sort: List[str]) -> int:
     try:
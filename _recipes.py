@@ -135,6 +135,7 @@ recipes: List[Recipe] = [
         target_ext=["epub"],
         overwrite_cover=False,
         category="Magazines",
+        concurrency_key="economist",
         tags=["business"],
         enable_on=onlyon_weekdays([4]),
         timeout=360,
@@ -145,6 +146,7 @@ recipes: List[Recipe] = [
         src_ext="mobi",
         target_ext=["epub"],
         category="Online Magazines",
+        concurrency_key="economist",
         enable_on=onlyon_weekdays([1, 3, 5]) and onlyat_hours(list(range(12, 19))),
         cover_options=CoverOptions(
             logo_path_or_url="https://www.economist.com/cdn-cgi/image/width=480,quality=80,format=auto/sites/default/files/images/2021/04/articles/main/1843-master-logo-2019-black.png"
@@ -214,6 +216,7 @@ recipes: List[Recipe] = [
         src_ext="mobi",
         target_ext=["epub"],
         category="News",
+        concurrency_key="ft",
         tags=["business"],
         cover_options=CoverOptions(
             logo_path_or_url="https://www.ft.com/partnercontent/content-hub/static/media/ft-horiz-new-black.215c1169.png"
@@ -479,6 +482,7 @@ recipes: List[Recipe] = [
         src_ext="mobi",
         target_ext=["epub"],
         category="News",
+        concurrency_key="nytimes",
         timeout=900,
         retry_attempts=0,
         enable_on=onlyat_hours(
@@ -494,6 +498,7 @@ recipes: List[Recipe] = [
         src_ext="mobi",
         target_ext=["epub"],
         category="News",
+        concurrency_key="nytimes",
         timeout=1320,
         retry_attempts=0,
         enable_on=onlyat_hours(list(range(8, 12))),
@@ -507,6 +512,7 @@ recipes: List[Recipe] = [
         src_ext="mobi",
         target_ext=["epub"],
         category="Arts & Culture",
+        concurrency_key="nytimes",
         timeout=300,
         retry_attempts=0,
         enable_on=onlyat_hours(list(range(18, 22))),
@@ -521,6 +527,7 @@ recipes: List[Recipe] = [
         src_ext="mobi",
         target_ext=["epub"],
         category="Magazines",
+        concurrency_key="nytimes",
         overwrite_cover=False,
         enable_on=onlyon_weekdays([5]) and onlyat_hours(list(range(18, 22))),
     ),
@@ -703,6 +710,7 @@ recipes: List[Recipe] = [
         target_ext=["epub"],
         timeout=600,
         category="News",
+        concurrency_key="washingtonpost",
         cover_options=CoverOptions(
             logo_path_or_url="https://www.washingtonpost.com/sf/brand-connect/dell-technologies/the-economics-of-change/media/wp_logo_black.png"
         ),
@@ -715,6 +723,7 @@ recipes: List[Recipe] = [
         target_ext=["epub"],
         timeout=600,
         category="News",
+        concurrency_key="washingtonpost",
         cover_options=CoverOptions(
             logo_path_or_url="https://www.washingtonpost.com/sf/brand-connect/dell-technologies/the-economics-of-change/media/wp_logo_black.png"
         ),
@@ -0,0 +1,121 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# Records a timeline of the build in the Chrome trace event format
+# so that it can be loaded into https://ui.perfetto.dev/ or chrome://tracing
+# Ref: https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU/
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Set
+
+
+def _now_us() -> float:
+    # wall clock so that events from recipe processes line up
+    return time.time() * 1_000_000
+
+
+class Tracer:
+    """Collects trace events from the generator and from recipe processes"""
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.events: List[Dict] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self.pid,
+                "args": {"name": "newsrack"},
+            }
+        ]
+        self.named_threads: Set[int] = set()
+        self.lock = threading.Lock()
+
+    def _add(self, event: Dict) -> None:
+        with self.lock:
+            self.events.append(event)
+
+    def _thread_id(self) -> int:
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        if tid not in self.named_threads:
+            self.named_threads.add(tid)
+            self._add(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": {"name": thread.name},
+                }
+            )
+        return tid
+
+    @contextmanager
+    def span(self, name: str, cat: str = "build", **args) -> Iterator[None]:
+        """
+        Record the duration of the block as a complete event
+
+        :param name:
+        :param cat: Category
+        :param args: Shown with the event
+        :return:
+        """
+        tid = self._thread_id()
+        start = _now_us()
+        try:
+            yield
+        finally:
+            self._add(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": _now_us() - start,
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+
+    def add_events_file(self, file_path: Path, process_name: str) -> None:
+        """
+        Merge events written by a recipe process, one json event per line
+
+        :param file_path:
+        :param process_name:
+        :return:
+        """
+        if not file_path.exists():
+            return
+        pids = set()
+        with file_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # incomplete line from a killed process
+                    continue
+                pids.add(event.get("pid"))
+                self._add(event)
+        for pid in pids:
+            self._add(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "args": {"name": process_name},
+                }
+            )
+
+    def save(self, file_path: Path) -> None:
+        with self.lock:
+            events = list(self.events)
+        with file_path.open("w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -2,17 +2,21 @@
 #
 # This software is released under the GNU General Public License v3.0
 # https://opensource.org/licenses/GPL-3.0
+import hashlib
+import json
 import logging
 import os.path
 import re
 import sys
 import textwrap
 import unicodedata
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import IO, Dict, Optional, Tuple, Union
 
 import requests
-from PIL import Image, ImageDraw, ImageFont  # type: ignore
+from PIL import Image, ImageDraw, ImageFilter, ImageFont  # type: ignore
 
 from _recipe_utils import CoverOptions
 
@@ -87,8 +91,149 @@ def calc_resize(
     return None
 
 
+def save_cover_and_thumbnail(
+    image_source: Union[Path, IO[bytes]],
+    cover_file_name: Path,
+    thumbnail_file_name: Path,
+    cover_max_size: Tuple[int, int] = (1024, 1024),
+    thumbnail_max_size: Tuple[int, int] = (500, 500),
+) -> None:
+    """
+    Save a downsized cover and thumbnail from a single decode of the cover image
+
+    :param image_source: Cover image file or stream
+    :param cover_file_name: Filename the cover is saved as
+    :param thumbnail_file_name: Filename the thumbnail is saved as
+    :param cover_max_size: tuple of (width, height)
+    :param thumbnail_max_size: tuple of (width, height)
+    :return:
+    """
+    sharpen = ImageFilter.UnsharpMask(radius=0.5, percent=100, threshold=0)
+    with Image.open(image_source) as img:
+        # let the JPEG decoder downscale (by up to 1/8) while keeping it >= max size
+        img.draft("RGB", cover_max_size)
+        cover = img.convert("RGB")
+    cover_new_size = calc_resize(cover_max_size, cover.size)
+    if cover_new_size:
+        cover = cover.resize(cover_new_size, Image.Resampling.LANCZOS)
+    cover.filter(sharpen).save(cover_file_name, "JPEG", quality=70, optimize=True)
+
+    thumbnail_new_size = calc_resize(thumbnail_max_size, cover.size)
+    thumbnail = (
+        cover.resize(thumbnail_new_size, Image.Resampling.LANCZOS)
+        if thumbnail_new_size
+        else cover
+    )
+    thumbnail.filter(sharpen).save(thumbnail_file_name, "JPEG", quality=80)
+
+
+@lru_cache(maxsize=None)
+def _get_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, font_size)
+
+
+@lru_cache(maxsize=None)
+def _get_logo(logo_url: str, logo_cache_folder: Optional[Path] = None) -> bytes:
+    """
+    Download a logo. If a cache folder is specified, the logo is saved there and
+    revalidated using its ETag/Last-Modified on the next run instead of being
+    downloaded again. Logos are only fetched once per process.
+
+    :param logo_url:
+    :param logo_cache_folder:
+    :return:
+    """
+    headers = {"User-Agent": "Mozilla/5.0"}
+    cached_logo_path = cached_logo_meta_path = None
+    cached_logo_meta: Dict[str, str] = {}
+    if logo_cache_folder:
+        logo_key = hashlib.sha256(logo_url.encode("utf-8")).hexdigest()
+        cached_logo_path = logo_cache_folder.joinpath(logo_key)
+        cached_logo_meta_path = logo_cache_folder.joinpath(f"{logo_key}.json")
+        if cached_logo_path.exists() and cached_logo_meta_path.exists():
+            try:
+                with cached_logo_meta_path.open("r", encoding="utf-8") as f:
+                    cached_logo_meta = json.load(f)
+            except (OSError, ValueError):
+                cached_logo_meta = {}
+        if cached_logo_meta.get("etag"):
+            headers["If-None-Match"] = cached_logo_meta["etag"]
+        if cached_logo_meta.get("last_modified"):
+            headers["If-Modified-Since"] = cached_logo_meta["last_modified"]
+
+    try:
+        res = requests.get(
+            logo_url,
+            headers=headers,
+            # don't wait long if we have a copy to fall back on
+            timeout=10 if cached_logo_meta else 60,
+        )
+        if res.status_code == 304 and cached_logo_path:
+            return cached_logo_path.read_bytes()
+        res.raise_for_status()
+    except requests.exceptions.RequestException:
+        if cached_logo_meta and cached_logo_path:
+            return cached_logo_path.read_bytes()
+        raise
+
+    if logo_cache_folder and cached_logo_path and cached_logo_meta_path:
+        logo_cache_folder.mkdir(parents=True, exist_ok=True)
+        cached_logo_path.write_bytes(res.content)
+        with cached_logo_meta_path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "url": logo_url,
+                    "etag": res.headers.get("ETag", ""),
+                    "last_modified": res.headers.get("Last-Modified", ""),
+                },
+                f,
+            )
+    return res.content
+
+
+@lru_cache(maxsize=32)
+def _get_logo_layer(
+    logo_path_or_url: str,
+    logo_max_width: int,
+    logo_max_height: int,
+    background_colour: str,
+    logo_cache_folder: Optional[Path] = None,
+) -> Image.Image:
+    """
+    The resized logo composited onto the cover background, ready to be pasted
+
+    :param logo_path_or_url:
+    :param logo_max_width:
+    :param logo_max_height:
+    :param background_colour:
+    :param logo_cache_folder:
+    :return:
+    """
+    if os.path.exists(logo_path_or_url):
+        image_pointer: Union[str, IO[bytes]] = logo_path_or_url
+    else:
+        image_pointer = BytesIO(_get_logo(logo_path_or_url, logo_cache_folder))
+
+    with Image.open(image_pointer).convert("RGBA") as logo:
+        if (logo.width / logo.height) >= 0.8:
+            # close to square-ish, so we reduce the max height a little
+            # so that there's a little more space above the text
+            logo_max_height = int(logo_max_height * 0.9)
+
+        logo_new_size = calc_resize((logo_max_width, logo_max_height), logo.size)
+        if logo_new_size:
+            logo = logo.resize(logo_new_size)
+
+        background = Image.new("RGBA", logo.size, background_colour)
+        return Image.alpha_composite(background, logo)
+
+
 def generate_cover(
-    file_name: Path, title_text: str, cover_options: CoverOptions, logger=None
+    file_name: Path,
+    title_text: str,
+    cover_options: CoverOptions,
+    logger=None,
+    logo_cache_folder: Optional[Path] = None,
 ):
     """
     Generate a plain image cover file
@@ -97,6 +242,7 @@ def generate_cover(
     :param title_text: Cover text
     :param cover_options: Cover options
     :param logger: Logger instance
+    :param logo_cache_folder: Folder to keep downloaded logos in
     :return:
     """
     if not logger:
@@ -106,10 +252,8 @@ def generate_cover(
         logger.addHandler(ch)
         logger.setLevel(logging.INFO)
 
-    font_title = ImageFont.truetype(
-        cover_options.title_font_path, cover_options.title_font_size
-    )
-    font_date = ImageFont.truetype(
+    font_title = _get_font(cover_options.title_font_path, cover_options.title_font_size)
+    font_date = _get_font(
         cover_options.datestamp_font_path, cover_options.datestamp_font_size
     )
 
@@ -204,28 +348,15 @@ def generate_cover(
 
         if cover_options.logo_path_or_url:
             try:
-                logo_buffer_gap_x = 0.05 * cover_options.cover_width
                 logo_buffer_gap_y = 0.05 * cover_options.cover_height
-
-                if os.path.exists(cover_options.logo_path_or_url):
-                    image_pointer = cover_options.logo_path_or_url
-                else:
-                    res = requests.get(
-                        cover_options.logo_path_or_url,
-                        headers={"User-Agent": "Mozilla/5.0"},
-                        timeout=60,
-                        stream=True,
-                    )
-                    res.raise_for_status()
-                    image_pointer = res.raw
-
-                with Image.open(image_pointer).convert("RGBA") as logo:
-                    logo_max_width = int(
+                logo = _get_logo_layer(
+                    cover_options.logo_path_or_url,
+                    int(
                         cover_options.cover_width
                         - 2 * (cover_options.border_offset + cover_options.border_width)
-                        - 2 * logo_buffer_gap_x  # buffer space
-                    )
-                    logo_max_height = int(
+                        - 2 * 0.05 * cover_options.cover_width  # buffer space
+                    ),
+                    int(
                         (
                             cover_options.cover_height
                             - total_height
@@ -234,30 +365,17 @@ def generate_cover(
                             - 2 * logo_buffer_gap_y  # buffer space
                         )
                         / 2
-                    )
-                    if (logo.width / logo.height) >= 0.8:
-                        # close to square-ish, so we reduce the max height a little
-                        # so that there's a little more space above the text
-                        logo_max_height = int(logo_max_height * 0.9)
-
-                    logo_new_size = calc_resize(
-                        (logo_max_width, logo_max_height), logo.size
-                    )
-                    if logo_new_size:
-                        logger.debug(f"Resizing logo to {logo_new_size}")
-                        logo = logo.resize(logo_new_size)
-
-                    background = Image.new(
-                        "RGBA", logo.size, cover_options.background_colour
-                    )
-                    logo_alpha_composite = Image.alpha_composite(background, logo)
-                    logo_pos_x = int((cover_options.cover_width - logo.width) / 2)
-                    logo_pos_y = int(
-                        cover_options.border_offset
-                        + cover_options.border_width
-                        + logo_buffer_gap_y
-                    )
-                    img.paste(logo_alpha_composite, (logo_pos_x, logo_pos_y))
+                    ),
+                    cover_options.background_colour,
+                    logo_cache_folder,
+                )
+                logo_pos_x = int((cover_options.cover_width - logo.width) / 2)
+                logo_pos_y = int(
+                    cover_options.border_offset
+                    + cover_options.border_width
+                    + logo_buffer_gap_y
+                )
+                img.paste(logo, (logo_pos_x, logo_pos_y))
 
             except Exception:  # noqa, pylint: disable=broad-except
                 # fail gracefully since logo is not absolutely necessary
@@ -6,7 +6,6 @@
 """
 fivethirtyeight.com is no more
 """
-import json
 import os
 import sys
 from datetime import timezone
@@ -16,7 +15,6 @@ from html import unescape
 sys.path.append(os.environ["recipes_includes"])
 from recipes_shared import WordPressNewsrackRecipe, format_title, get_date_format
 
-from calibre.ptempfile import PersistentTemporaryDirectory, PersistentTemporaryFile
 from calibre.web.feeds.news import BasicNewsRecipe
 
 _name = "FiveThirtyEight"
@@ -29,6 +27,7 @@ class FiveThirtyEight(WordPressNewsrackRecipe, BasicNewsRecipe):
     __author__ = "ping"
 
     oldest_article = 14
+    wp_post_fields = WordPressNewsrackRecipe.wp_post_fields + ["espn_verticals"]
     max_articles_per_feed = 10
     masthead_url = "https://upload.wikimedia.org/wikipedia/commons/thumb/1/13/FiveThirtyEight_Logo.svg/1024px-FiveThirtyEight_Logo.svg.png"
 
@@ -55,7 +54,7 @@ class FiveThirtyEight(WordPressNewsrackRecipe, BasicNewsRecipe):
 
     def preprocess_raw_html(self, raw_html, url):
         # formulate the api response into html
-        post = json.loads(raw_html)
+        post = self.get_stored_post(raw_html, url)
 
         return f"""<html>
         <head><title>{post["title"]["rendered"]}</title></head>
@@ -68,7 +67,6 @@ class FiveThirtyEight(WordPressNewsrackRecipe, BasicNewsRecipe):
     def parse_index(self):
         br = self.get_browser()
         articles = {}
-        self.temp_dir = PersistentTemporaryDirectory()
 
         for feed_name, feed_url in self.feeds:
             custom_params = {
@@ -96,9 +94,6 @@ class FiveThirtyEight(WordPressNewsrackRecipe, BasicNewsRecipe):
                 if section_name not in articles:
                     articles[section_name] = []
 
-                with PersistentTemporaryFile(suffix=".json", dir=self.temp_dir) as f:
-                    f.write(json.dumps(p).encode("utf-8"))
-
                 verticals = []
                 if p.get("espn_verticals"):
                     try:
@@ -117,7 +112,7 @@ class FiveThirtyEight(WordPressNewsrackRecipe, BasicNewsRecipe):
                 articles[section_name].append(
                     {
                         "title": unescape(p["title"]["rendered"]) or "Untitled",
-                        "url": "file://" + f.name,
+                        "url": self.store_post(p),
                         "date": f"{post_date:{get_date_format()}}",
                         "description": unescape(" / ".join(verticals)),
                     }
@@ -68,7 +68,7 @@ class ForeignPolicy(WordPressNewsrackRecipe, BasicNewsRecipe):
 
     def preprocess_raw_html(self, raw_html, url):
         # formulate the api response into html
-        post = json.loads(raw_html)
+        post = self.get_stored_post(raw_html, url)
         if not post:
             self.abort_article()
         date_published_loc = self.parse_date(post["date"], tz_info=None, as_utc=False)
@@ -63,8 +63,9 @@ class FinancialTimes(BasicCookielessNewsrackRecipe, BasicNewsRecipe):
         return urljoin("https://ft.com", url)
 
     def preprocess_raw_html(self, raw_html, url):
-        soup = self.soup(raw_html)
-        article = self.get_ld_json(soup, lambda d: d.get("@type", "") == "NewsArticle")
+        article = self.get_ld_json_from_html(
+            raw_html, lambda d: d.get("@type", "") == "NewsArticle"
+        )
         if not (article and article.get("articleBody")):
             err_msg = f"Unable to find article: {url}"
             self.log.warning(err_msg)
@@ -3,7 +3,6 @@
 # This software is released under the GNU General Public License v3.0
 # https://opensource.org/licenses/GPL-3.0
 
-import json
 import os
 import sys
 
@@ -30,6 +29,7 @@ class FulcrumSg(WordPressNewsrackRecipe, BasicNewsRecipe):
     masthead_url = "https://i0.wp.com/fulcrum.sg/wp-content/uploads/logo.png"
 
     oldest_article = 30  # days
+    wp_post_fields = WordPressNewsrackRecipe.wp_post_fields + ["commentaries_author"]
     compress_news_images_auto_size = 10
     reverse_article_order = False
 
@@ -107,7 +107,7 @@ class FulcrumSg(WordPressNewsrackRecipe, BasicNewsRecipe):
 
     def preprocess_raw_html(self, raw_html, url):
         # formulate the api response into html
-        post = json.loads(raw_html)
+        post = self.get_stored_post(raw_html, url)
         date_published_loc = self.parse_date(post["date"], tz_info=None, as_utc=False)
         if post.get("commentaries_author"):
             post_authors = [post["commentaries_author"]]
@@ -0,0 +1,123 @@
+# Copyright (c) 2022 https://github.com/ping/
+#
+# This software is released under the GNU General Public License v3.0
+# https://opensource.org/licenses/GPL-3.0
+
+# Decodes javascript object literals, e.g. from `window.__STATE__ = {...};` scripts.
+# Kept separate from recipes_shared so that it does not need calibre.
+import json
+import re
+
+JS_TOKEN_RE = re.compile(
+    r"""
+    (?P<string>"(?:[^"\\]|\\.)*")
+    |(?P<js_string>'(?:[^'\\]|\\.)*')
+    |(?P<template>`(?:[^`\\]|\\.)*`)
+    |(?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<key>(?:[A-Za-z_$][\w$]*|\d+)(?=\s*:))   # unquoted key
+    |(?P<infinity>[+-]?Infinity\b)
+    |(?P<radix_number>[+-]?0(?:[xX][0-9a-fA-F]+|[oO][0-7]+|[bB][01]+))
+    |(?P<number>[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<identifier>[A-Za-z_$][\w$]*)
+    |(?P<trailing_comma>,(?=\s*[\]}]))
+    |(?P<other>[^"'`/\w$,.+-]+|.)                 # whitespace, punctuation
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+JS_ESCAPE_RE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|.)", re.DOTALL)
+# control characters and escapes that are valid in js but not in json
+JSON_UNSAFE_STRING_RE = re.compile(r'[\x00-\x1f]|\\[^"\\/bfnrtu]')
+JS_ESCAPES = {
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+    "0": "\0",
+}
+JS_LITERALS = {"true": "true", "false": "false", "null": "null"}
+
+
+def _js_string_to_json(js_string: str) -> str:
+    def unescape_js(match) -> str:
+        escape = match.group(1)
+        if len(escape) > 1:  # \xHH, \uHHHH
+            return chr(int(escape[1:], 16))
+        if escape == "\n":  # line continuation
+            return ""
+        return JS_ESCAPES.get(escape, escape)
+
+    # ensure_ascii so that surrogate pairs are kept as escapes
+    return json.dumps(JS_ESCAPE_RE.sub(unescape_js, js_string[1:-1]))
+
+
+def _js_number_to_json(js_number: str) -> str:
+    """
+    Normalise a decimal js number into a json one, e.g. +1 -> 1, .5 -> 0.5, 1. -> 1.0
+
+    :param js_number:
+    :return:
+    """
+    sign, number = "", js_number.lstrip("+")
+    if number.startswith("-"):
+        sign, number = "-", number[1:]
+    mantissa, e, exponent = number.replace("E", "e").partition("e")
+    integer, dot, fraction = mantissa.partition(".")
+    mantissa = (integer.lstrip("0") or "0") + (f".{fraction or '0'}" if dot else "")
+    return f"{sign}{mantissa}{e}{exponent}"
+
+
+def js_literal_to_json(js: str) -> str:
+    """
+    Convert a javascript object literal into json, i.e. handle unquoted keys,
+    single quoted and template strings, undefined, NaN, Infinity, hex/octal/binary
+    and other number forms, trailing commas and comments
+
+    :param js:
+    :return:
+    """
+    output = []
+    for match in JS_TOKEN_RE.finditer(js):
+        token_type, token = match.lastgroup, match.group()
+        if token_type == "string":
+            output.append(
+                _js_string_to_json(token)
+                if JSON_UNSAFE_STRING_RE.search(token)
+                else token
+            )
+        elif token_type == "js_string":
+            output.append(_js_string_to_json(token))
+        elif token_type == "template":
+            # a template with substitutions cannot be evaluated here
+            output.append("null" if "${" in token else _js_string_to_json(token))
+        elif token_type == "key":
+            output.append(json.dumps(token))
+        elif token_type == "radix_number":
+            output.append(str(int(token, 0)))
+        elif token_type == "number":
+            output.append(_js_number_to_json(token))
+        elif token_type in ("identifier", "infinity"):
+            # undefined, NaN, Infinity have no json equivalent
+            output.append(JS_LITERALS.get(token, "null"))
+        elif token_type in ("comment", "trailing_comma"):
+            continue
+        else:
+            output.append(token)
+    return "".join(output)
+
+
+def parse_js_literal(js: str):
+    """
+    Decode a javascript object literal, e.g. from a `window.__STATE__ = {...};` script
+
+    :param js:
+    :return:
+    """
+    js = js.strip()
+    if js.endswith(";"):
+        js = js[:-1]
+    try:
+        return json.loads(js)
+    except json.JSONDecodeError:
+        return json.loads(js_literal_to_json(js))
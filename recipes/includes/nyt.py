@@ -1,13 +1,11 @@
 import json
 import os
-import random
-import time
 from urllib.parse import urlparse
 
 from calibre import browser
 from calibre.ebooks.BeautifulSoup import BeautifulSoup
 
-from recipes_shared import BasicNewsrackRecipe, get_date_format
+from recipes_shared import BasicNewsrackRecipe, HostPolicy, get_date_format
 
 
 class NYTRecipe(BasicNewsrackRecipe):
@@ -18,7 +16,13 @@ class NYTRecipe(BasicNewsrackRecipe):
 
     delay = 0
     simultaneous_downloads = 1
-    delay_range = list(range(2, 5))
+    image_prefetch_workers = 8
+    image_prefetch_hosts = ["static01.nyt.com", "mwcm.nyt.com"]  # not delayed
+    # 2-5s between requests to each host, except for static assets
+    default_host_policy = HostPolicy(interval=2, jitter=3)
+    host_policies = {host: None for host in image_prefetch_hosts}
+    # the editions often have the same articles
+    share_articles = True
     bot_blocked = False
 
     # The NYT occassionally returns bogus articles for some reason just in case
@@ -49,8 +53,41 @@ class NYTRecipe(BasicNewsrackRecipe):
         br.set_handle_gzip(True)
         return br.open_novisit(rq, timeout=3 * 60)
 
-    def open_novisit(self, *args, **kwargs):
-        target_url = args[0]
+    def canonical_url(self, url):
+        parsed_url = urlparse(url)
+        if parsed_url.hostname == "www.nytimes.com":
+            # drop tracking params, e.g. ?partner=rss&emc=rss
+            return parsed_url._replace(query="", fragment="").geturl()
+        return super().canonical_url(url)
+
+    def open_novisit(self, url_or_request, *args, **kwargs):
+        article_store = self.get_article_store()
+        if (
+            not article_store
+            or args
+            or kwargs.get("data") is not None
+            or not isinstance(url_or_request, str)
+        ):
+            # only plain GET requests are shared
+            return self._open_novisit(url_or_request, *args, **kwargs)
+
+        # articles and images already downloaded by another NYT recipe in this run
+        target_url = url_or_request
+        store_key = self.canonical_url(target_url)
+        res = article_store.get_response(store_key)
+        if res:
+            self.log.debug(f"Using shared article: {target_url}")
+            return res
+        return article_store.save_response(
+            store_key, self._open_novisit(target_url, **kwargs)
+        )
+
+    def _open_novisit(self, url_or_request, *args, **kwargs):
+        target_url = (
+            url_or_request
+            if isinstance(url_or_request, str)
+            else url_or_request.get_full_url()
+        )
         is_wayback_cached = urlparse(target_url).netloc == "www.nytimes.com"
 
         if is_wayback_cached and self.bot_blocked:
@@ -59,18 +96,13 @@ class NYTRecipe(BasicNewsrackRecipe):
             self.log.warn(f"Block detected. Fetching from wayback cache: {target_url}")
             return self.open_from_wayback(target_url)
 
-        if urlparse(target_url).hostname not in ("static01.nyt.com", "mwcm.nyt.com"):
-            # we could have used the new get_url_specific_delay() but
-            # wayback requests don't need to be delayed
-            sleep_interval = random.choice(self.delay_range)
-            self.log.debug(f"Sleeping {sleep_interval}s before fetching {target_url}")
-            time.sleep(sleep_interval)
-
         br = browser(
             user_agent="Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
         )
         try:
-            return br.open_novisit(*args, **kwargs)
+            # we could have used the new get_url_specific_delay() but
+            # wayback requests don't need to be delayed
+            return self.get_rate_limiter().open(br, url_or_request, *args, **kwargs)
         except Exception as e:
             if hasattr(e, "code") and e.code == 403:
                 self.bot_blocked = True
@@ -290,8 +322,9 @@ class NYTRecipe(BasicNewsrackRecipe):
         return str(soup)
 
     def preprocess_raw_html(self, raw_html, url):
-        soup = BeautifulSoup(raw_html)
-        info = self.get_script_json(soup, r"window.__preloadedData\s*=\s*")
+        info = self.get_script_json_from_html(
+            raw_html, r"window.__preloadedData\s*=\s*"
+        )
         if not info:
             if os.environ.get("recipe_debug_folder", ""):
                 recipe_folder = os.path.join(
@@ -1,20 +1,33 @@
+import hashlib
+import io
 import json
 import os
+import random
 import re
 import shutil
+import threading
 import time
 import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta, timezone
+from functools import wraps
 from html import unescape
-from typing import Optional, Dict, List, Callable
-from urllib.parse import urlencode
+from http.client import HTTPMessage
+from math import ceil
+from types import SimpleNamespace
+from typing import Optional, Dict, Iterable, Iterator, List, Callable, NamedTuple, Tuple
+from urllib.parse import unquote, urlencode, urlparse
 
 from calibre import browser
 from calibre.constants import iswindows
 from calibre.ebooks.BeautifulSoup import BeautifulSoup
-from calibre.ptempfile import PersistentTemporaryDirectory, PersistentTemporaryFile
+from calibre.ptempfile import PersistentTemporaryDirectory
 from calibre.utils.browser import Browser
 from calibre.web.feeds import Feed
+from mechanize import HTTPError, Request
+
+from js_literal import js_literal_to_json, parse_js_literal  # noqa: F401
 
 
 def get_date_format() -> str:
@@ -70,6 +83,655 @@ def parse_date(
     return dt
 
 
+_trace_lock = threading.Lock()
+
+
+@contextmanager
+def trace_span(name: str, cat: str = "recipe", **args):
+    """
+    Record the duration of the block as a Chrome trace event in the file set
+    by newsrack so that it shows up in the build timeline. Does nothing
+    if not run by newsrack.
+
+    :param name:
+    :param cat: Category
+    :param args: Shown with the event
+    :return:
+    """
+    trace_file = os.environ.get("newsrack_trace_file")
+    if not trace_file:
+        yield
+        return
+    start = time.time() * 1_000_000
+    try:
+        yield
+    finally:
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start,
+            "dur": time.time() * 1_000_000 - start,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with _trace_lock, open(trace_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+
+
+class CachedResponse(io.BytesIO):
+    """A response from the HTTP cache, with the parts of the mechanize response api used by recipes"""
+
+    code = 200
+
+    def __init__(self, body: bytes, url: str, headers: List[Tuple[str, str]]):
+        super().__init__(body)
+        self.url = url
+        self.headers = HTTPMessage()
+        for k, v in headers:
+            self.headers[k] = v
+
+    def info(self) -> HTTPMessage:
+        return self.headers
+
+    def geturl(self) -> str:
+        return self.url
+
+    def getcode(self) -> int:
+        return self.code
+
+
+class HttpCache:
+    """
+    An on-disk cache of GET responses keyed by url. The folder is set by newsrack
+    per recipe and kept between runs so that retries and later runs reuse
+    what has already been downloaded.
+    """
+
+    # not valid for the decoded body that is cached
+    skip_headers = ("content-encoding", "content-length", "transfer-encoding")
+
+    def __init__(self, folder: str, ttl: int):
+        self.folder = folder
+        self.ttl = ttl
+        os.makedirs(folder, exist_ok=True)
+
+    def _entry_paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return (
+            os.path.join(self.folder, f"{key}.json"),
+            os.path.join(self.folder, f"{key}.body"),
+        )
+
+    @staticmethod
+    def _write(file_path: str, content: bytes) -> None:
+        # write to a temp file first so that other recipes never see a partial entry
+        temp_file_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_file_path, file_path)
+
+    def get(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._entry_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or not os.path.exists(body_path):
+            return None
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["fetched"] < self.ttl
+
+    def validators(self, entry: Dict) -> Dict[str, str]:
+        """
+        Headers for a conditional request to revalidate a stale entry
+
+        :param entry:
+        :return:
+        """
+        headers = {}
+        for k, v in entry["headers"]:
+            if k.lower() == "etag":
+                headers["If-None-Match"] = v
+            elif k.lower() == "last-modified":
+                headers["If-Modified-Since"] = v
+        return headers
+
+    def response(self, entry: Dict) -> CachedResponse:
+        _, body_path = self._entry_paths(entry["url"])
+        with open(body_path, "rb") as f:
+            return CachedResponse(f.read(), entry["final_url"], entry["headers"])
+
+    def store(
+        self, url: str, final_url: str, body: bytes, headers: List[Tuple[str, str]]
+    ) -> Dict:
+        meta_path, body_path = self._entry_paths(url)
+        entry = {
+            "url": url,
+            "final_url": final_url,
+            "fetched": time.time(),
+            "headers": [
+                (k, v) for k, v in headers if k.lower() not in self.skip_headers
+            ],
+        }
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(entry).encode("utf-8"))
+        return entry
+
+    def touch(self, entry: Dict) -> None:
+        """
+        Mark an entry as fresh after it has been revalidated
+
+        :param entry:
+        :return:
+        """
+        entry["fetched"] = time.time()
+        meta_path, body_path = self._entry_paths(entry["url"])
+        self._write(meta_path, json.dumps(entry).encode("utf-8"))
+        os.utime(body_path)
+
+
+class CachingBrowser:
+    """
+    Wraps a calibre browser so that GET requests made with open_novisit()
+    go through the HTTP cache. Everything else is passed through.
+    """
+
+    def __init__(self, br: Browser, http_cache: HttpCache):
+        object.__setattr__(self, "_br", br)
+        object.__setattr__(self, "_http_cache", http_cache)
+
+    def __getattr__(self, name):
+        return getattr(self._br, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._br, name, value)
+
+    def clone_browser(self) -> "CachingBrowser":
+        return CachingBrowser(self._br.clone_browser(), self._http_cache)
+
+    def open_novisit(self, url_or_request, data=None, **kwargs):
+        if data is not None or not isinstance(url_or_request, str):
+            # only plain GET requests are cached
+            return self._br.open_novisit(url_or_request, data, **kwargs)
+
+        url = url_or_request
+        entry = self._http_cache.get(url)
+        if entry and self._http_cache.is_fresh(entry):
+            return self._http_cache.response(entry)
+        validators = self._http_cache.validators(entry) if entry else {}
+        try:
+            res = self._br.open_novisit(
+                Request(url, headers=validators) if validators else url, **kwargs
+            )
+        except HTTPError as err:
+            if entry and err.code == 304:
+                self._http_cache.touch(entry)
+                return self._http_cache.response(entry)
+            raise
+        try:
+            entry = self._http_cache.store(
+                url, res.geturl(), res.read(), list(res.info().items())
+            )
+        finally:
+            res.close()
+        return self._http_cache.response(entry)
+
+
+class ArticleStore(HttpCache):
+    """
+    Responses shared by the recipes in a newsrack run, keyed by canonical url
+    so that an article published in several editions is downloaded once.
+    Entries do not expire because newsrack removes the folder after the run.
+    """
+
+    def __init__(self, folder: str):
+        super().__init__(folder, ttl=0)
+
+    def get_response(self, key: str) -> Optional[CachedResponse]:
+        entry = self.get(key)
+        return self.response(entry) if entry else None
+
+    def save_response(self, key: str, res) -> CachedResponse:
+        """
+        Store a response and return a copy of it that can be read
+
+        :param key: Canonical url
+        :param res: Response from a browser
+        :return:
+        """
+        try:
+            entry = self.store(key, res.geturl(), res.read(), list(res.info().items()))
+        finally:
+            res.close()
+        return self.response(entry)
+
+
+class HostPolicy(NamedTuple):
+    """How often a host can be requested"""
+
+    interval: float  # seconds between requests, 0 to not rate limit
+    jitter: float = 0  # up to this many seconds randomly added to each interval
+    burst: int = 1  # requests that can be made without waiting
+    max_backoff: float = 8  # max multiplier of the interval after 403/429 responses
+
+
+class _TokenBucket:
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.tokens = float(policy.burst)
+        self.updated = time.monotonic()
+        self.backoff = 1.0
+
+    def _interval(self) -> float:
+        return self.policy.interval * self.backoff
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.policy.burst, self.tokens + (now - self.updated) / self._interval()
+        )
+        self.updated = now
+
+    def reserve(self) -> float:
+        """
+        Take a token
+
+        :return: Seconds to wait before making the request
+        """
+        self._refill()
+        interval = self._interval()
+        # jitter is taken as part of the token so that queued requests stay spaced out
+        self.tokens -= 1 + random.uniform(0, self.policy.jitter) / interval
+        return max(0.0, -self.tokens * interval)
+
+    def penalize(self, retry_after: float = 0) -> None:
+        self._refill()
+        self.backoff = min(self.backoff * 2, self.policy.max_backoff)
+        self.tokens = min(self.tokens, -retry_after / self._interval())
+
+    def reward(self) -> None:
+        self._refill()
+        self.backoff = max(1.0, self.backoff / 2)
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests with a token bucket per host so that waiting on a
+    throttled host does not hold up requests to other hosts. The interval
+    for a host backs off when it responds with a 403 or 429.
+    """
+
+    throttled_codes = (403, 429)
+
+    def __init__(
+        self,
+        policies: Dict[str, Optional[HostPolicy]],
+        default_policy: Optional[HostPolicy] = None,
+    ):
+        """
+
+        :param policies: Policies by hostname, hosts set to None are not rate limited
+        :param default_policy: Policy for hosts not in policies
+        """
+        self.policies = policies
+        self.default_policy = default_policy
+        self.buckets: Dict[str, _TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, url: str) -> Optional[_TokenBucket]:
+        host = urlparse(url).hostname or ""
+        policy = self.policies.get(host, self.default_policy)
+        if not (policy and policy.interval > 0):
+            return None
+        bucket = self.buckets.get(host)
+        if not bucket:
+            bucket = self.buckets.setdefault(host, _TokenBucket(policy))
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """
+        Wait until a request can be made to the url's host
+
+        :param url:
+        :return: Seconds waited
+        """
+        with self.lock:
+            bucket = self._bucket(url)
+            wait = bucket.reserve() if bucket else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def update(self, url: str, status: int, retry_after: Optional[str] = None) -> None:
+        """
+        Adjust the url host's rate from a response
+
+        :param url:
+        :param status: HTTP status code
+        :param retry_after: Retry-After header value
+        :return:
+        """
+        with self.lock:
+            bucket = self._bucket(url)
+            if not bucket:
+                return
+            if status in self.throttled_codes:
+                # http-date values are not supported, backing off should cover it
+                bucket.penalize(
+                    float(retry_after)
+                    if retry_after and retry_after.strip().isdigit()
+                    else 0
+                )
+            else:
+                bucket.reward()
+
+    def open(self, br, url_or_request, *args, **kwargs):
+        """
+        Make a rate limited request with br.open_novisit()
+
+        :param br:
+        :param url_or_request:
+        :return:
+        """
+        url = (
+            url_or_request
+            if isinstance(url_or_request, str)
+            else url_or_request.get_full_url()
+        )
+        self.acquire(url)
+        try:
+            res = br.open_novisit(url_or_request, *args, **kwargs)
+        except HTTPError as err:
+            headers = getattr(err, "headers", None)
+            self.update(url, err.code, headers.get("Retry-After") if headers else None)
+            raise
+        self.update(url, res.getcode() or 200)
+        return res
+
+
+class RateLimitedBrowser:
+    """
+    Wraps a calibre browser so that requests made with open_novisit()
+    are rate limited per host. Everything else is passed through.
+    """
+
+    def __init__(self, br: Browser, rate_limiter: HostRateLimiter):
+        object.__setattr__(self, "_br", br)
+        object.__setattr__(self, "_rate_limiter", rate_limiter)
+
+    def __getattr__(self, name):
+        return getattr(self._br, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._br, name, value)
+
+    def clone_browser(self) -> "RateLimitedBrowser":
+        return RateLimitedBrowser(self._br.clone_browser(), self._rate_limiter)
+
+    def open_novisit(self, url_or_request, *args, **kwargs):
+        return self._rate_limiter.open(self._br, url_or_request, *args, **kwargs)
+
+
+class RecipeCheckpoint:
+    """
+    Saves a recipe's parsed index and downloaded articles to a folder set by newsrack
+    so that a run that is retried after a timeout resumes instead of starting over.
+    """
+
+    # relative links in the article html, e.g. images shared with other articles
+    link_re = re.compile(r"""(?:src|href)=["']([^"'#?:]+)["']""")
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.articles_folder = os.path.join(folder, "articles")
+        os.makedirs(self.articles_folder, exist_ok=True)
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        return value
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, dict) and "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        return value
+
+    def load_index(self) -> Optional[Tuple[List, Dict]]:
+        """
+        :return: The parsed index and recipe attributes, or None if not checkpointed
+        """
+        try:
+            with open(
+                os.path.join(self.folder, "index.json"), "r", encoding="utf-8"
+            ) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return saved["index"], {
+            k: self._decode(v) for k, v in saved["attributes"].items()
+        }
+
+    def save_index(self, index: List, attributes: Dict) -> None:
+        content = json.dumps(
+            {
+                "index": index,
+                "attributes": {k: self._encode(v) for k, v in attributes.items()},
+            }
+        )
+        index_path = os.path.join(self.folder, "index.json")
+        with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(f"{index_path}.tmp", index_path)
+
+    @staticmethod
+    def article_key(feed_index: int, article_index: int, url: str) -> str:
+        return hashlib.sha256(
+            f"{feed_index}/{article_index}/{url}".encode("utf-8")
+        ).hexdigest()
+
+    def _linked_files(self, output_dir: str, article_dir: str) -> List[str]:
+        linked = set()
+        for root, _, file_names in os.walk(article_dir):
+            for file_name in file_names:
+                if not file_name.endswith((".html", ".xhtml")):
+                    continue
+                with open(
+                    os.path.join(root, file_name),
+                    "r",
+                    encoding="utf-8",
+                    errors="ignore",
+                ) as f:
+                    for link in self.link_re.findall(f.read()):
+                        link_path = os.path.normpath(os.path.join(root, unquote(link)))
+                        if link_path.startswith(output_dir) and os.path.isfile(
+                            link_path
+                        ):
+                            linked.add(link_path)
+        return sorted(linked)
+
+    def save_article(self, key: str, article_dir: str, result: Tuple) -> None:
+        """
+        Copy a downloaded article, and the files it links to, into the checkpoint
+
+        :param key:
+        :param article_dir:
+        :param result: Return value of BasicNewsRecipe._fetch_article()
+        :return:
+        """
+        article_folder = os.path.join(self.articles_folder, key)
+        if os.path.exists(article_folder):
+            # fetch_obfuscated_article() calls fetch_article(), both are checkpointed
+            return
+        article_dir = os.path.abspath(article_dir)
+        output_dir = os.path.dirname(os.path.dirname(article_dir))
+        res, paths, failures = result
+        file_paths = set(self._linked_files(output_dir, article_dir))
+        for root, _, file_names in os.walk(article_dir):
+            file_paths.update(os.path.join(root, f) for f in file_names)
+
+        temp_folder = os.path.join(self.articles_folder, f"{key}.tmp")
+        shutil.rmtree(temp_folder, ignore_errors=True)
+        for file_path in file_paths:
+            dest = os.path.join(
+                temp_folder, "files", os.path.relpath(file_path, output_dir)
+            )
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.copyfile(file_path, dest)
+        with open(os.path.join(temp_folder, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "res": os.path.relpath(res, output_dir),
+                    "paths": [os.path.relpath(p, output_dir) for p in paths],
+                    "failures": failures,
+                },
+                f,
+                default=str,
+            )
+        os.replace(temp_folder, article_folder)
+
+    def restore_article(self, key: str, article_dir: str) -> Optional[Tuple]:
+        """
+        Copy a checkpointed article back into the recipe output
+
+        :param key:
+        :param article_dir:
+        :return: The saved return value of BasicNewsRecipe._fetch_article()
+        """
+        article_folder = os.path.join(self.articles_folder, key)
+        try:
+            with open(
+                os.path.join(article_folder, "meta.json"), "r", encoding="utf-8"
+            ) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        article_dir = os.path.abspath(article_dir)
+        output_dir = os.path.dirname(os.path.dirname(article_dir))
+        files_folder = os.path.join(article_folder, "files")
+        for root, _, file_names in os.walk(files_folder):
+            for file_name in file_names:
+                rel_path = os.path.relpath(os.path.join(root, file_name), files_folder)
+                dest = os.path.join(output_dir, rel_path)
+                if os.path.exists(dest) and not dest.startswith(article_dir):
+                    # already downloaded by another article in this attempt
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copyfile(os.path.join(root, file_name), dest)
+        return (
+            os.path.join(output_dir, meta["res"]),
+            [os.path.join(output_dir, p) for p in meta["paths"]],
+            meta["failures"],
+        )
+
+
+class ImagePrefetcher:
+    """
+    Downloads and recompresses article images in a thread pool ahead of
+    calibre's serial image processing. Prefetched images are handed to calibre
+    as local files, which it reads without a delay or a network request.
+    """
+
+    def __init__(self, recipe, folder: str, max_workers: int):
+        self.recipe = recipe
+        self.folder = folder
+        # calibre's effective image options, see RecursiveFetcher
+        options = recipe.web2disk_options
+        self.options = SimpleNamespace(
+            compress_news_images=getattr(options, "compress_news_images", False),
+            compress_news_images_max_size=getattr(
+                options, "compress_news_images_max_size", None
+            ),
+            compress_news_images_auto_size=getattr(
+                options, "compress_news_images_auto_size", 16
+            ),
+            scale_news_images=getattr(options, "scale_news_images", None),
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-prefetch"
+        )
+        self.futures: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def prefetch(self, urls: Iterable[str]) -> None:
+        with self.lock:
+            for url in urls:
+                if url not in self.futures:
+                    self.futures[url] = self.executor.submit(self._fetch, url)
+
+    def _browser(self):
+        br = getattr(self.local, "browser", None)
+        if br is None:
+            br = getattr(self.recipe, "browser", None) or self.recipe.get_browser()
+            br = self.recipe.clone_browser(br)
+            self.local.browser = br
+        return br
+
+    def _process(self, data: bytes) -> Tuple[bytes, str]:
+        """
+        Convert and rescale an image the way calibre's RecursiveFetcher does
+        so that calibre has no further recompression to do.
+
+        :param data:
+        :return: Image data and file extension
+        """
+        from calibre.utils.img import image_from_data, image_to_data
+        from calibre.utils.imghdr import what
+        from calibre.web.fetch.simple import RecursiveFetcher
+
+        itype = what(None, data)
+        if itype == "svg" or (itype is None and b"<svg" in data[:1024]):
+            return data, "svg"
+        img = image_from_data(data)
+        if itype not in ("png", "jpg", "jpeg"):
+            itype = "png" if itype == "gif" else "jpeg"
+            data = image_to_data(img, fmt=itype)
+        if self.options.compress_news_images and itype in ("jpg", "jpeg"):
+            data = RecursiveFetcher.rescale_image(self.options, data)
+        return data, "jpg" if itype == "jpeg" else itype
+
+    def _fetch(self, url: str) -> str:
+        with trace_span("prefetch_image", url=url):
+            data = self._browser().open_novisit(url, timeout=self.recipe.timeout).read()
+            if data == b"GIF89a\x01":
+                raise ValueError("Empty image")
+            data, ext = self._process(data)
+        file_path = os.path.join(
+            self.folder, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.{ext}"
+        )
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return file_path
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Wait for a prefetched image
+
+        :param url:
+        :return: Local file path, or None if the image was not prefetched
+        """
+        with self.lock:
+            future = self.futures.get(url)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as err:  # noqa
+            # let calibre fetch it again and report the error
+            self.recipe.log.debug(f"Unable to prefetch image {url}: {err}")
+            return None
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
 def format_title(feed_name: str, post_date: datetime) -> str:
     """
     Format title
@@ -109,6 +771,27 @@ def extract_from_img_srcset(srcset: str, max_width=0):
     return parsed_sources[-1][0]
 
 
+SCRIPT_RE = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.DOTALL | re.IGNORECASE)
+HTML_ATTR_RE = re.compile(
+    r"""([\w:.-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?"""
+)
+
+
+def iter_scripts(raw_html: str) -> Iterator[Tuple[Dict[str, str], str]]:
+    """
+    Scan raw html for script elements without building a soup
+
+    :param raw_html:
+    :return: attributes and contents of each script
+    """
+    for match in SCRIPT_RE.finditer(raw_html):
+        attrs = {
+            a.group(1).lower(): unescape(a.group(2) or a.group(3) or a.group(4) or "")
+            for a in HTML_ATTR_RE.finditer(match.group(1))
+        }
+        yield attrs, match.group(2)
+
+
 class BasicNewsrackRecipe(object):
     encoding = "utf-8"
     remove_javascript = True
@@ -125,10 +808,275 @@ class BasicNewsrackRecipe(object):
     timefmt = ""  # suppress date output
     pub_date: Optional[datetime] = None  # custom publication date
     temp_dir: Optional[PersistentTemporaryDirectory] = None
+    # seconds to keep GET responses from open_novisit() in the recipe's HTTP cache, 0 to disable
+    http_cache_ttl = 0
+    # share downloaded articles with other recipes in the same newsrack run
+    share_articles = False
+    # resume from the parsed index and downloaded articles when newsrack retries a run
+    enable_checkpoints = True
+    # concurrent downloads of article images ahead of calibre, 0 to disable.
+    # Not used for recipes with their own image_url_processor() or preprocess_image().
+    image_prefetch_workers = 0
+    # hosts to prefetch images from, None for all hosts.
+    # Recipes that throttle requests only prefetch from the hosts listed here.
+    image_prefetch_hosts: Optional[List[str]] = None
+    image_prefetcher: Optional[ImagePrefetcher] = None
+    # request rate limits by hostname, hosts set to None are not rate limited
+    host_policies: Dict[str, Optional[HostPolicy]] = {}
+    # rate limit for hosts not in host_policies, None to not rate limit them
+    default_host_policy: Optional[HostPolicy] = None
+    _rate_limiter: Optional[HostRateLimiter] = None
+    _rate_limiter_lock = threading.Lock()
+    # feeds downloaded at the same time by parse_feeds(), 1 to download them one by one
+    max_concurrent_feeds = 4
+    max_concurrent_feeds_per_host = 2
+    # set in parse_index() and restored when resuming from a checkpointed index
+    checkpoint_attributes = [
+        "title",
+        "pub_date",
+        "cover_url",
+        "masthead_url",
+        "timefmt",
+        "temp_dir",
+    ]
 
     def publication_date(self) -> Optional[datetime]:
         return self.pub_date
 
+    def get_http_cache(self) -> Optional[HttpCache]:
+        """
+        The shared HTTP cache if enabled for the recipe and run by newsrack
+
+        :return:
+        """
+        http_cache_dir = os.environ.get("newsrack_http_cache_dir")
+        if not (self.http_cache_ttl and http_cache_dir):
+            return None
+        return HttpCache(http_cache_dir, self.http_cache_ttl)
+
+    def get_rate_limiter(self) -> Optional[HostRateLimiter]:
+        """
+        The recipe's rate limiter, shared by all its browsers
+
+        :return: None if the recipe has no host policies
+        """
+        if not (self.host_policies or self.default_host_policy):
+            return None
+        with self._rate_limiter_lock:
+            if not self._rate_limiter:
+                self._rate_limiter = HostRateLimiter(
+                    self.host_policies, self.default_host_policy
+                )
+        return self._rate_limiter
+
+    def get_article_store(self) -> Optional[ArticleStore]:
+        """
+        The article store shared by the recipes in a newsrack run if enabled for the recipe
+
+        :return:
+        """
+        article_store_dir = os.environ.get("newsrack_article_store_dir")
+        if not (self.share_articles and article_store_dir):
+            return None
+        return ArticleStore(article_store_dir)
+
+    def canonical_url(self, url: str) -> str:
+        """
+        The url that identifies an article in the shared article store
+
+        :param url:
+        :return:
+        """
+        return urlparse(url)._replace(fragment="").geturl()
+
+    def get_browser(self, *args, **kwargs):
+        br = super().get_browser(*args, **kwargs)  # type: ignore[misc]
+        rate_limiter = self.get_rate_limiter()
+        if rate_limiter:
+            br = RateLimitedBrowser(br, rate_limiter)
+        http_cache = self.get_http_cache()
+        return CachingBrowser(br, http_cache) if http_cache else br
+
+    def _traced(self, name: str, method: Callable) -> Callable:
+        @wraps(method)
+        def traced_method(*args, **kwargs):
+            span_args = {}
+            if name.startswith("fetch_") and args:
+                # fetch_embedded_article() gets the article instead of the url
+                span_args["url"] = (
+                    args[0] if isinstance(args[0], str) else getattr(args[0], "url", "")
+                )
+            with trace_span(name, **span_args):
+                return method(*args, **kwargs)
+
+        return traced_method
+
+    def _checkpointed_parse_index(
+        self, checkpoint: RecipeCheckpoint, parse_index: Callable
+    ) -> Callable:
+        @wraps(parse_index)
+        def checkpointed_parse_index():
+            saved = checkpoint.load_index()
+            if saved:
+                index, attributes = saved
+                self.log("Resuming from the checkpointed index")  # type: ignore[attr-defined]
+                for k, v in attributes.items():
+                    setattr(self, k, v)
+                return index
+            index = parse_index()
+            try:
+                checkpoint.save_index(
+                    index,
+                    {k: getattr(self, k, None) for k in self.checkpoint_attributes},
+                )
+            except (TypeError, ValueError, OSError) as err:
+                self.log.warning(f"Unable to checkpoint index: {err}")  # type: ignore[attr-defined]
+            return index
+
+        return checkpointed_parse_index
+
+    def _checkpointed_fetch(
+        self, checkpoint: RecipeCheckpoint, fetch_method: Callable
+    ) -> Callable:
+        @wraps(fetch_method)
+        def checkpointed_fetch(url_or_article, dir_, f, a, *args, **kwargs):
+            # fetch_embedded_article() gets the article instead of the url
+            url = (
+                url_or_article
+                if isinstance(url_or_article, str)
+                else getattr(url_or_article, "url", "")
+            )
+            key = checkpoint.article_key(f, a, url)
+            restored = checkpoint.restore_article(key, dir_)
+            if restored:
+                self.log.debug(f"Restored checkpointed article: {url}")  # type: ignore[attr-defined]
+                return restored
+            result = fetch_method(url_or_article, dir_, f, a, *args, **kwargs)
+            try:
+                checkpoint.save_article(key, dir_, result)
+            except (OSError, ValueError) as err:
+                self.log.warning(f"Unable to checkpoint article {url}: {err}")  # type: ignore[attr-defined]
+            return result
+
+        return checkpointed_fetch
+
+    def is_prefetchable_image(self, image_url: str) -> bool:
+        """
+        Check if an image can be downloaded ahead of calibre
+
+        :param image_url:
+        :return:
+        """
+        if not image_url.startswith(("http://", "https://")):
+            return False
+        if self.image_prefetch_hosts is not None:
+            return urlparse(image_url).hostname in self.image_prefetch_hosts
+        # don't bypass the recipe's throttling
+        return not self.is_throttled()
+
+    def is_throttled(self) -> bool:
+        """
+        Check if the recipe spaces out its requests with calibre's delay or by
+        downloading one article at a time instead of with host policies
+
+        :return:
+        """
+        if self.get_rate_limiter():
+            return False
+        return bool(
+            getattr(self, "delay", 0) or getattr(self, "simultaneous_downloads", 5) == 1
+        )
+
+    def _prefetching_preprocess_html(
+        self, prefetcher: ImagePrefetcher, preprocess_html: Callable
+    ) -> Callable:
+        @wraps(preprocess_html)
+        def prefetching_preprocess_html(soup, *args, **kwargs):
+            soup = preprocess_html(soup, *args, **kwargs)
+            # relative srcs are left to calibre because the article url is not available here
+            prefetcher.prefetch(
+                img["src"]
+                for img in (soup.find_all("img", src=True) if soup else [])
+                if self.is_prefetchable_image(img["src"])
+            )
+            return soup
+
+        return prefetching_preprocess_html
+
+    def _prefetched_image_url(self, prefetcher: ImagePrefetcher) -> Callable:
+        def prefetched_image_url(_, image_url):
+            file_path = prefetcher.get(image_url)
+            # calibre reads local files without a delay
+            return f"file://{file_path}" if file_path else image_url
+
+        return prefetched_image_url
+
+    def _overrides(self, method_name: str) -> bool:
+        """
+        Check if a calibre recipe method is overridden by the recipe
+
+        :param method_name:
+        :return:
+        """
+        return any(
+            method_name in vars(c)
+            for c in type(self).__mro__
+            if not c.__module__.startswith("calibre.")
+        )
+
+    def build_index(self):
+        # preprocess_image() expects the image as downloaded, and
+        # image_url_processor() can depend on the article url which is
+        # not known when images are queued for prefetching
+        if self.image_prefetch_workers and not (
+            self._overrides("preprocess_image")
+            or self._overrides("image_url_processor")
+        ):
+            self.image_prefetcher = ImagePrefetcher(
+                self,
+                PersistentTemporaryDirectory(prefix="images_"),
+                self.image_prefetch_workers,
+            )
+            web2disk_options = self.web2disk_options  # type: ignore[attr-defined]
+            web2disk_options.preprocess_html = self._prefetching_preprocess_html(
+                self.image_prefetcher,
+                getattr(web2disk_options, "preprocess_html", self.preprocess_html),  # type: ignore[attr-defined]
+            )
+            self.image_url_processor = self._prefetched_image_url(self.image_prefetcher)
+        checkpoint_dir = os.environ.get("newsrack_checkpoint_dir")
+        if checkpoint_dir and self.enable_checkpoints:
+            checkpoint = RecipeCheckpoint(checkpoint_dir)
+            if getattr(self, "parse_index", None):
+                self.parse_index = self._checkpointed_parse_index(
+                    checkpoint, self.parse_index
+                )
+            for method_name in (
+                "fetch_article",
+                "fetch_obfuscated_article",
+                "fetch_embedded_article",
+            ):
+                method = getattr(self, method_name, None)
+                if method:
+                    setattr(
+                        self,
+                        method_name,
+                        self._checkpointed_fetch(checkpoint, method),
+                    )
+        if os.environ.get("newsrack_trace_file"):
+            # trace index parsing and article fetches
+            for method_name in (
+                "parse_index",
+                "parse_feeds",
+                "fetch_article",
+                "fetch_obfuscated_article",
+                "fetch_embedded_article",
+            ):
+                method = getattr(self, method_name, None)
+                if method:
+                    setattr(self, method_name, self._traced(method_name, method))
+        with trace_span("build_index"):
+            return super().build_index()  # type: ignore[misc]
+
     def parse_date(
         self,
         date_string: str,
@@ -147,6 +1095,8 @@ class BasicNewsrackRecipe(object):
         return parse_date(date_string, tz_info, as_utc, **kwargs)
 
     def cleanup(self) -> None:
+        if self.image_prefetcher:
+            self.image_prefetcher.shutdown()
         if self.temp_dir:
             self.log("Deleting temp files...")  # type: ignore[attr-defined]
             shutil.rmtree(self.temp_dir)
@@ -192,18 +1142,66 @@ class BasicNewsrackRecipe(object):
                 continue
             if prefix_expr:
                 script_js = prefix_expr_re.sub("", script_js)
-            if script_js.endswith(";"):
-                script_js = script_js[:-1]
-            script_js = script_js.replace(":undefined", ":null")
             try:
-                return json.loads(script_js)
+                return parse_js_literal(script_js)
             except json.JSONDecodeError:
-                # sometimes this borks because of a stray '\n', e.g. scmp
-                try:
-                    return json.loads(script_js.replace("\n", " "))
-                except json.JSONDecodeError:
-                    self.log.exception("Unable to parse script as json")
-                    self.log.debug(script.contents[0])
+                self.log.exception("Unable to parse script as json")
+                self.log.debug(script.contents[0])
+        return {}
+
+    def get_script_json_from_html(
+        self,
+        raw_html: str,
+        prefix_expr: str = "",
+        script_id: Optional[str] = None,
+        script_type: Optional[str] = None,
+    ) -> Dict:
+        """
+        Like get_script_json() but scans the raw html instead of a soup,
+        for when the soup would only be used to get the script
+
+        :param raw_html:
+        :param prefix_expr:
+        :param script_id: Match by the script id, e.g. "__NEXT_DATA__"
+        :param script_type: Match by the script type, e.g. "application/json"
+        :return:
+        """
+        prefix_expr_re = re.compile(prefix_expr) if prefix_expr else None
+        for attrs, script_js in iter_scripts(raw_html):
+            if script_id is not None and attrs.get("id") != script_id:
+                continue
+            if script_type is not None and attrs.get("type") != script_type:
+                continue
+            if "src" in attrs:
+                continue
+            script_js = script_js.strip()
+            if not script_js:
+                continue
+            if prefix_expr_re:
+                if not prefix_expr_re.match(script_js):
+                    continue
+                script_js = prefix_expr_re.sub("", script_js, count=1)
+            try:
+                return parse_js_literal(script_js)
+            except json.JSONDecodeError:
+                self.log.exception("Unable to parse script as json")  # type: ignore[attr-defined]
+                self.log.debug(script_js)  # type: ignore[attr-defined]
+        return {}
+
+    def get_ld_json_from_html(self, raw_html: str, filter_fn: Callable) -> Dict:
+        """
+        Like get_ld_json() but scans the raw html instead of a soup
+
+        :param raw_html:
+        :param filter_fn:
+        :return:
+        """
+        for attrs, script_json in iter_scripts(raw_html):
+            if attrs.get("type") != "application/ld+json" or not script_json.strip():
+                continue
+            data = parse_js_literal(script_json)
+            if filter_fn(data):
+                return data
         return {}
 
     def extract_from_img_srcset(self, srcset: str, max_width=0):
@@ -229,6 +1227,92 @@ class BasicNewsrackRecipe(object):
             )
         ]
 
+    def _fetch_feed(
+        self, title: Optional[str], url: str, host_slots: Dict[str, threading.Semaphore]
+    ) -> Feed:
+        """
+        Download and parse a feed the way calibre's parse_feeds() does
+
+        :param title:
+        :param url:
+        :param host_slots: Limits the concurrent downloads per host
+        :return:
+        """
+        from calibre.web.feeds import feed_from_xml
+
+        br = self.clone_browser(self.browser)  # type: ignore[attr-defined]
+        purl = urlparse(url, allow_fragments=False)
+        if purl.username or purl.password:
+            hostname = purl.hostname or ""
+            if purl.port:
+                hostname += f":{purl.port}"
+            url = purl._replace(netloc=hostname).geturl()
+            if purl.username and purl.password:
+                br.add_password(url, purl.username, purl.password)
+        with host_slots[purl.hostname or ""]:
+            try:
+                with closing(br.open_novisit(url, timeout=self.timeout)) as f:
+                    raw = f.read()
+                feed = feed_from_xml(
+                    raw,
+                    title=title,
+                    log=self.log,  # type: ignore[attr-defined]
+                    oldest_article=self.oldest_article,  # type: ignore[attr-defined]
+                    max_articles_per_feed=self.max_articles_per_feed,  # type: ignore[attr-defined]
+                    get_article_url=self.get_article_url,  # type: ignore[attr-defined]
+                )
+            except Exception as err:  # noqa
+                feed = Feed()
+                msg = f"Failed feed: {title if title else url}"
+                feed.populate_from_preparsed_feed(msg, [])
+                feed.description = str(err)
+                self.log.exception(msg)  # type: ignore[attr-defined]
+            delay = self.get_url_specific_delay(url)  # type: ignore[attr-defined]
+            if delay > 0:
+                time.sleep(delay)
+        return feed
+
+    def parse_feeds(self):
+        """
+        Download the feeds concurrently, up to max_concurrent_feeds at a time
+        and max_concurrent_feeds_per_host per host. Feeds are returned in the
+        order they are listed, as calibre does.
+
+        :return:
+        """
+        if self.max_concurrent_feeds <= 1 or self.is_throttled():
+            return super().parse_feeds()  # type: ignore[misc]
+
+        feeds = []
+        for obj in self.get_feeds():  # type: ignore[attr-defined]
+            title, url = (None, obj) if isinstance(obj, (str, bytes)) else obj
+            if isinstance(title, bytes):
+                title = title.decode("utf-8")
+            if isinstance(url, bytes):
+                url = url.decode("utf-8")
+            if url.startswith("feed://"):
+                url = "http" + url[4:]
+            feeds.append((title, url))
+
+        hosts = {urlparse(url).hostname or "" for _, url in feeds}
+        host_slots = {
+            host: threading.Semaphore(self.max_concurrent_feeds_per_host)
+            for host in hosts
+        }
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrent_feeds, thread_name_prefix="feeds"
+        ) as executor:
+            futures = []
+            for title, url in feeds:
+                self.report_progress(0, f"Fetching feed {title if title else url}...")  # type: ignore[attr-defined]
+                futures.append(
+                    executor.submit(self._fetch_feed, title, url, host_slots)
+                )
+            parsed_feeds = [future.result() for future in futures]
+        if self.remove_empty_feeds:
+            parsed_feeds = [f for f in parsed_feeds if len(f) > 0]
+        return parsed_feeds
+
     def group_feeds_by_date(
         self, timezone_offset_hours: int = 0, filter_article: Optional[Callable] = None
     ):
@@ -239,7 +1323,8 @@ class BasicNewsrackRecipe(object):
         :param filter_article:
         :return:
         """
-        parsed_feeds = super().parse_feeds()
+        # not self.parse_feeds() because recipes call this from their parse_feeds()
+        parsed_feeds = BasicNewsrackRecipe.parse_feeds(self)
         if len(parsed_feeds or []) != 1:
             return parsed_feeds
 
@@ -315,6 +1400,12 @@ class BasicCookielessNewsrackRecipe(BasicNewsrackRecipe):
                 ("X-Forwarded-For", "66.249.66.1"),
             ]
         br.set_handle_gzip(True)
+        rate_limiter = self.get_rate_limiter()
+        if rate_limiter:
+            br = RateLimitedBrowser(br, rate_limiter)
+        http_cache = self.get_http_cache()
+        if http_cache:
+            br = CachingBrowser(br, http_cache)
         return br.open_novisit(*args, **kwargs)
 
     open = open_novisit
@@ -324,6 +1415,31 @@ class WordPressNewsrackRecipe(BasicNewsrackRecipe):
     use_embedded_content = False
     auto_cleanup = False  # don't clean up because it messes up the embed code and sometimes ruins the og-link logic
     is_wordpresscom = False
+    # post fields requested from the WP api, extend this for site specific fields
+    wp_post_fields = [
+        "id",
+        "date",
+        "date_gmt",
+        "modified",
+        "modified_gmt",
+        "link",
+        "title",
+        "excerpt",
+        "content",
+        "author",
+        "categories",
+        "tags",
+        "featured_media",
+        "_links",  # required for _embed
+        "_embedded",
+    ]
+    wp_max_concurrent_pages = 4
+    # posts from get_articles(), keyed by the article url
+    wp_posts: Optional[Dict[str, Dict]] = None
+    checkpoint_attributes = BasicNewsrackRecipe.checkpoint_attributes + [
+        "wp_posts",
+        "articles_are_obfuscated",
+    ]
 
     @staticmethod
     def parse_datetime(date_string, wordpresscom=False) -> datetime:
@@ -385,17 +1501,103 @@ class WordPressNewsrackRecipe(BasicNewsrackRecipe):
             pass
         return terms
 
+    def store_post(self, post: Dict) -> str:
+        """
+        Keep a post so that its article is served from memory instead of being fetched
+
+        :param post:
+        :return: The article url
+        """
+        if self.wp_posts is None:
+            self.wp_posts = {}
+        post_url = (
+            post.get("link")
+            or post.get("URL")  # wordpress.com
+            or f"wp-post:{post.get('id') or post.get('ID')}"
+        )
+        self.wp_posts[post_url] = post
+        # stored posts are served with get_obfuscated_article()
+        self.articles_are_obfuscated = True
+        return post_url
+
+    def get_stored_post(self, raw_html: str, url: str) -> Dict:
+        """
+        The post for an article, to be used in preprocess_raw_html()
+
+        :param raw_html:
+        :param url:
+        :return:
+        """
+        post = (self.wp_posts or {}).get(url)
+        return post if post is not None else json.loads(raw_html)
+
+    def get_obfuscated_article(self, url: str) -> Dict:
+        post = (self.wp_posts or {}).get(url)
+        if post is None:
+            # not from get_articles(), so fetch it as usual
+            br = self.get_browser()  # type: ignore[attr-defined]
+            return {
+                "data": br.open_novisit(url, timeout=self.timeout).read(),
+                "url": url,
+            }
+        return {"data": json.dumps(post), "url": url}
+
     def populate_article_metadata(self, article, soup, _):
         # pick up the og link from preprocess_raw_html() and set it as url instead of the api endpoint
         og_link = soup.select_one("[data-og-link]")
         if og_link:
             article.url = og_link["data-og-link"]
 
+    def _get_posts_page(
+        self, feed_url: str, params: Dict, br: Browser
+    ) -> Tuple[List, Optional[int]]:
+        """
+        Get a page of posts from WP
+
+        :param feed_url: WP posts endpoint
+        :param params:
+        :param br: browser instance
+        :return: posts, and the total number of pages if known
+        """
+        endpoint = f"{feed_url}?{urlencode(params)}"
+        self.log.debug(f"Fetching {endpoint} ...")  # type: ignore[attr-defined]
+        res = br.open_novisit(endpoint, timeout=self.timeout)
+        posts_json_raw_bytes = res.read()
+        encodings = ["utf-8", "utf-8-sig"]
+        for i, encoding in enumerate(encodings, start=1):
+            try:
+                posts_json = json.loads(posts_json_raw_bytes.decode(encoding))
+                break
+            except json.decoder.JSONDecodeError as json_err:
+                self.log.warning(f"Error decoding json: {json_err}")  # type: ignore[attr-defined]
+                if i < len(encodings):
+                    continue
+                raise
+
+        total_pages = None
+        try:
+            if self.is_wordpresscom:
+                if posts_json.get("found") is not None:
+                    total_pages = ceil(int(posts_json["found"]) / params["number"])
+            else:
+                headers = res.info()
+                if headers.get("x-wp-totalpages"):
+                    total_pages = int(headers["x-wp-totalpages"])
+        except:  # noqa
+            # do nothing else if we can't parse for page info
+            # rely on HTTP 400 to detect paging break
+            pass
+        if self.is_wordpresscom:
+            return posts_json.get("posts", []), total_pages
+        return posts_json, total_pages
+
     def get_posts(
         self, feed_url: str, oldest_article: int, custom_params: Dict, br: Browser
     ) -> list:
         """
-        Get posts from WP
+        Get posts from WP. The remaining pages are fetched concurrently
+        once the total number of pages is known from the first page.
+
         :param feed_url: WP posts endpoint
         :param oldest_article: in days
         :param custom_params: overwrite default params
@@ -403,17 +1605,15 @@ class WordPressNewsrackRecipe(BasicNewsrackRecipe):
         :return:
         """
         per_page = 100
-        page = 1
-        posts = []
-
         cutoff_date = datetime.today().replace(
             hour=0, minute=0, second=0, microsecond=0
         ) - timedelta(days=oldest_article)
+        cache_buster = int(time.time() * 1000)
 
         if not custom_params:
             custom_params = {}
 
-        while True:
+        def page_params(page: int) -> Dict:
             if self.is_wordpresscom:
                 params = {
                     "page": page,
@@ -427,56 +1627,63 @@ class WordPressNewsrackRecipe(BasicNewsrackRecipe):
                     "per_page": per_page,
                     "after": cutoff_date.isoformat(),
                     "_embed": "1",
-                    "_": int(time.time() * 1000),
+                    "_fields": ",".join(self.wp_post_fields),
+                    "_": cache_buster,
                 }
             params.update(custom_params)
             # clear out None values to allow custom_params to unset default params
             for k in [k for k in params.keys() if params[k] is None]:
                 del params[k]
+            return params
 
-            endpoint = f"{feed_url}?{urlencode(params)}"
-            self.log.debug(f"Fetching {endpoint} ...")  # type: ignore[attr-defined]
-            retrieved_posts = []
+        posts: List = []
+        page = 1
+        total_pages = None
+        while True:
             try:
-                res = br.open_novisit(endpoint, timeout=self.timeout)
-                posts_json_raw_bytes = res.read()
-                encodings = ["utf-8", "utf-8-sig"]
-                for i, encoding in enumerate(encodings, start=1):
-                    try:
-                        posts_json_raw = posts_json_raw_bytes.decode(encoding)
-                        if self.is_wordpresscom:
-                            retrieved_posts = json.loads(posts_json_raw).get(
-                                "posts", []
-                            )
-                        else:
-                            retrieved_posts = json.loads(posts_json_raw)
-                        break
-                    except json.decoder.JSONDecodeError as json_err:
-                        self.log.warning(f"Error decoding json: {json_err}")
-                        if i < len(encodings):
-                            continue
-                        raise
-
-                if not retrieved_posts:
-                    break
-                posts.extend(retrieved_posts)
-                try:
-                    # abort early to save one extra request
-                    headers = res.info()
-                    if headers.get("x-wp-totalpages"):
-                        wp_totalpages = int(headers["x-wp-totalpages"])
-                        if wp_totalpages == page:
-                            break
-                except:
-                    # do nothing else if we can't parse headers for page info
-                    # rely on HTTP 400 to detect paging break
-                    pass
-                page += 1
+                retrieved_posts, total_pages = self._get_posts_page(
+                    feed_url, page_params(page), br
+                )
             except json.decoder.JSONDecodeError:
                 raise
             except Exception as err:  # HTTP 400
-                self.log.warning(f"Error encountered while fetching posts: {err}")
+                self.log.warning(f"Error encountered while fetching posts: {err}")  # type: ignore[attr-defined]
+                break
+            if not retrieved_posts:
+                break
+            posts.extend(retrieved_posts)
+            if total_pages is not None:
                 break
+            # total pages unknown, so page sequentially until there are no more posts
+            page += 1
+
+        if total_pages and total_pages > page:
+            pages = list(range(page + 1, total_pages + 1))
+            with ThreadPoolExecutor(
+                max_workers=min(self.wp_max_concurrent_pages, len(pages))
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        self._get_posts_page,
+                        feed_url,
+                        page_params(p),
+                        # browsers are not thread safe
+                        br.clone_browser(),
+                    )
+                    for p in pages
+                ]
+            # merge in page order, stopping at the first page that could not be fetched
+            for future in futures:
+                try:
+                    retrieved_posts, _ = future.result()
+                except json.decoder.JSONDecodeError:
+                    raise
+                except Exception as err:  # HTTP 400
+                    self.log.warning(f"Error encountered while fetching posts: {err}")  # type: ignore[attr-defined]
+                    break
+                if not retrieved_posts:
+                    break
+                posts.extend(retrieved_posts)
 
         return posts
 
@@ -504,7 +1711,6 @@ class WordPressNewsrackRecipe(BasicNewsrackRecipe):
         """
         posts = self.get_posts(feed_url, oldest_article, custom_params, br)
 
-        self.temp_dir = PersistentTemporaryDirectory()
         latest_post_date = None
         for p in posts:
             if self.is_wordpresscom:
@@ -532,25 +1738,23 @@ class WordPressNewsrackRecipe(BasicNewsrackRecipe):
             else:
                 section_name = feed_name
 
-            with PersistentTemporaryFile(suffix=".json", dir=self.temp_dir) as f:
-                f.write(json.dumps(p).encode("utf-8"))
-                articles.setdefault(section_name, []).append(
-                    {
-                        "title": BeautifulSoup(
-                            unescape(
-                                p["title"]
-                                if self.is_wordpresscom
-                                else p["title"]["rendered"]
-                            )
-                        ).get_text()
-                        or "Untitled",
-                        "url": "file://" + f.name,
-                        "date": f"{post_date:{get_date_format()}}",
-                        "description": unescape(
-                            p["excerpt"]
+            articles.setdefault(section_name, []).append(
+                {
+                    "title": BeautifulSoup(
+                        unescape(
+                            p["title"]
                             if self.is_wordpresscom
-                            else p["excerpt"]["rendered"]
-                        ),
-                    }
-                )
+                            else p["title"]["rendered"]
+                        )
+                    ).get_text()
+                    or "Untitled",
+                    "url": self.store_post(p),
+                    "date": f"{post_date:{get_date_format()}}",
+                    "description": unescape(
+                        p["excerpt"]
+                        if self.is_wordpresscom
+                        else p["excerpt"]["rendered"]
+                    ),
+                }
+            )
         return articles
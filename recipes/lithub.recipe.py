@@ -3,7 +3,6 @@
 # This software is released under the GNU General Public License v3.0
 # https://opensource.org/licenses/GPL-3.0
 
-import json
 import os
 import sys
 
@@ -95,7 +94,7 @@ class LitHub(WordPressNewsrackRecipe, BasicNewsRecipe):
 
     def preprocess_raw_html(self, raw_html, url):
         # formulate the api response into html
-        post = json.loads(raw_html)
+        post = self.get_stored_post(raw_html, url)
         date_published_loc = self.parse_date(post["date"], tz_info=None, as_utc=False)
         post_authors = self.extract_authors(post)
         categories = self.extract_categories(post)
@@ -42,6 +42,8 @@ class Nature(BasicNewsrackRecipe, BasicNewsRecipe):
     masthead_url = "https://media.springernature.com/full/nature-cms/uploads/product/nature/header-86f1267ea01eccd46b530284be10585e.svg"
 
     scale_news_images = (800, 1200)
+    # weekly issue, so pages fetched by a previous run or attempt are still current
+    http_cache_ttl = 6 * 60 * 60
 
     keep_only_tags = [dict(name="article")]
 
@@ -7,14 +7,13 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import datetime
-import json
 import os
 import re
 import sys
 
 # custom include to share code between recipes
 sys.path.append(os.environ["recipes_includes"])
-from recipes_shared import BasicNewsrackRecipe, format_title
+from recipes_shared import BasicNewsrackRecipe, format_title, parse_js_literal
 from nyt import NYTRecipe
 
 from calibre import strftime
@@ -144,7 +143,7 @@ class NewYorkTimesPrint(NYTRecipe, BasicNewsrackRecipe, BasicNewsRecipe):
         )[0]
         script = type("")(script)
         json_data = script[script.find("{") : script.rfind(";")].strip().rstrip(";")
-        data = json.loads(json_data.replace(":undefined", ":null"))["initialState"]
+        data = parse_js_literal(json_data)["initialState"]
         containers, sections = {}, {}
         article_map = {}
         gc_pat = re.compile(r"groupings.(\d+).containers.(\d+)")
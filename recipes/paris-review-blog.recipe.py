@@ -6,7 +6,6 @@
 """
 theparisreview.org
 """
-import json
 import os
 import sys
 
@@ -84,7 +83,7 @@ class ParisReviewBlog(WordPressNewsrackRecipe, BasicNewsRecipe):
 
     def preprocess_raw_html(self, raw_html, url):
         # formulate the api response into html
-        post = json.loads(raw_html)
+        post = self.get_stored_post(raw_html, url)
         date_published_loc = self.parse_date(post["date"], tz_info=None, as_utc=False)
         post_authors = self.extract_authors(post)
         categories = self.extract_categories(post)
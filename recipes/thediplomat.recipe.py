@@ -6,7 +6,6 @@
 """
 thediplomat.com
 """
-import json
 import os
 import sys
 from html import unescape
@@ -85,7 +84,7 @@ class TheDiplomat(WordPressNewsrackRecipe, BasicNewsRecipe):
 
     def preprocess_raw_html(self, raw_html, url):
         # formulate the api response into html
-        post = json.loads(raw_html)
+        post = self.get_stored_post(raw_html, url)
         post_date = self.parse_date(post["date"], tz_info=None, as_utc=False)
         soup = self.soup(
             f"""<html>
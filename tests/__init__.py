@@ -1,2 +1,11 @@
 # flake8: noqa
 from .tests_recipe_utils import RecipeUtilsTests
+from .tests_generate import GenerateTests
+from .tests_book_meta import BookMetaTests
+from .tests_job_log import JobLogTests
+from .tests_utils import UtilsTests
+from .tests_output_index import OutputIndexTests
+from .tests_compress import CompressTests
+from .tests_build_cache import BuildCacheTests
+from .tests_js_literal import JsLiteralTests
+from .tests_recipes_shared import RecipesSharedTests
@@ -0,0 +1,136 @@
+import struct
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from _book_meta import read_book_cover, read_book_meta
+
+OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title>The Paper [Sat, 17 Oct 2026]</dc:title>
+    <dc:date>2026-10-17T08:30:00+02:00</dc:date>
+    <dc:description>Articles in this issue:
+
+Headline One
+
+Headline Two
+
+The daily news</dc:description>
+    <meta name="cover" content="cover"/>
+  </metadata>
+  <manifest>
+    <item id="cover" href="images/cover.jpg" media-type="image/jpeg"/>
+  </manifest>
+</package>
+"""
+
+COMMENTS = [
+    "Articles in this issue:",
+    "Headline One",
+    "Headline Two",
+    "The daily news",
+]
+
+
+def _exth_record(record_type: int, data: bytes) -> bytes:
+    return struct.pack(">II", record_type, len(data) + 8) + data
+
+
+def _build_mobi(exth_records: bytes, full_name: bytes, images=()) -> bytes:
+    mobi_header_len = 232
+    record0 = bytearray(16 + mobi_header_len)
+    record0[16:20] = b"MOBI"
+    struct.pack_into(">I", record0, 20, mobi_header_len)
+    struct.pack_into(">I", record0, 28, 65001)  # utf-8
+    # first image index
+    struct.pack_into(">I", record0, 108, 1 if images else 0xFFFFFFFF)
+    struct.pack_into(">I", record0, 128, 0x40)  # has EXTH
+    exth_count = 0
+    pos = 0
+    while pos < len(exth_records):
+        exth_count += 1
+        pos += struct.unpack_from(">I", exth_records, pos + 4)[0]
+    record0 += (
+        b"EXTH" + struct.pack(">II", 12 + len(exth_records), exth_count) + exth_records
+    )
+    struct.pack_into(">II", record0, 84, len(record0), len(full_name))
+    record0 += full_name
+
+    records = [bytes(record0)] + list(images)
+    palmdb_header = bytearray(78)
+    struct.pack_into(">H", palmdb_header, 76, len(records))
+    record_offset = 78 + 8 * len(records) + 2
+    record_list = b""
+    for i, record in enumerate(records):
+        record_list += struct.pack(">II", record_offset, i)
+        record_offset += len(record)
+    return bytes(palmdb_header) + record_list + b"\0\0" + b"".join(records)
+
+
+class BookMetaTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_read_epub_meta(self):
+        epub_path = Path(self.temp_dir.name, "test.epub")
+        with zipfile.ZipFile(epub_path, "w") as epub:
+            epub.writestr("mimetype", "application/epub+zip")
+            epub.writestr(
+                "META-INF/container.xml",
+                '<?xml version="1.0"?>'
+                '<container version="1.0" '
+                'xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+                'media-type="application/oebps-package+xml"/></rootfiles>'
+                "</container>",
+            )
+            epub.writestr("OEBPS/content.opf", OPF)
+            epub.writestr("OEBPS/images/cover.jpg", b"cover image")
+        book_meta = read_book_meta(epub_path)
+        self.assertEqual(book_meta.title, "The Paper [Sat, 17 Oct 2026]")
+        self.assertEqual(
+            book_meta.pubdate, datetime(2026, 10, 17, 6, 30, tzinfo=timezone.utc)
+        )
+        self.assertEqual(book_meta.comments, COMMENTS)
+        self.assertEqual(book_meta.articles, ["Headline One", "Headline Two"])
+        self.assertTrue(book_meta.has_cover)
+        self.assertEqual(read_book_cover(epub_path), b"cover image")
+
+    def test_read_mobi_meta(self):
+        mobi_path = Path(self.temp_dir.name, "test.mobi")
+        mobi_path.write_bytes(
+            _build_mobi(
+                _exth_record(103, "\n\n".join(COMMENTS).encode("utf-8"))
+                + _exth_record(106, b"2026-10-17T08:30:00+00:00")
+                + _exth_record(201, struct.pack(">I", 1)),
+                b"The Paper",
+                images=[b"masthead image", b"cover image"],
+            )
+        )
+        book_meta = read_book_meta(mobi_path)
+        self.assertEqual(book_meta.title, "The Paper")
+        self.assertEqual(
+            book_meta.pubdate, datetime(2026, 10, 17, 8, 30, tzinfo=timezone.utc)
+        )
+        self.assertEqual(book_meta.articles, ["Headline One", "Headline Two"])
+        self.assertTrue(book_meta.has_cover)
+        self.assertEqual(read_book_cover(mobi_path), b"cover image")
+
+        # updated title takes precedence over the full name
+        mobi_path.write_bytes(
+            _build_mobi(
+                _exth_record(503, "The Paper – Updated".encode("utf-8")), b"The Paper"
+            )
+        )
+        book_meta = read_book_meta(mobi_path)
+        self.assertEqual(book_meta.title, "The Paper – Updated")
+        self.assertIsNone(book_meta.pubdate)
+        self.assertFalse(book_meta.has_cover)
+        self.assertIsNone(read_book_cover(mobi_path))
+
+    def test_unsupported_format(self):
+        self.assertIsNone(read_book_meta(Path(self.temp_dir.name, "test.pdf")))
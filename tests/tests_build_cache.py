@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from _build_cache import BuildCache
+
+
+class BuildCacheTests(unittest.TestCase):
+    def test_store_restore(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = BuildCache(Path(temp_dir, "cache"))
+            src = Path(temp_dir, "book.epub")
+            src.write_bytes(b"book")
+            key = cache.key("convert", "vox", "abc")
+            self.assertEqual(key, cache.key("convert", "vox", "abc"))
+            self.assertNotEqual(key, cache.key("convert", "vox", "def"))
+
+            dest = Path(temp_dir, "restored.epub")
+            self.assertFalse(cache.restore(key, dest))
+            cache.store(key, src)
+            self.assertTrue(cache.restore(key, dest))
+            self.assertEqual(dest.read_bytes(), b"book")
+
+    def test_prune(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = BuildCache(Path(temp_dir, "cache"))
+            src = Path(temp_dir, "book.epub")
+            src.write_bytes(b"x" * 100)
+            now = time.time()
+            keys = [cache.key(i) for i in range(4)]
+            for i, key in enumerate(keys):
+                cache.store(key, src)
+                # keys[0] is the least recently used
+                entry_path = cache._entry_path(key)
+                os.utime(entry_path, (now - 100 + i, now - 100 + i))
+            old_key = cache.key("old")
+            cache.store(old_key, src)
+            os.utime(cache._entry_path(old_key), (now - 3600, now - 3600))
+
+            # unused entries are kept if they are recent and the cache is small enough
+            cache.prune(max_age=600, max_size=1000)
+            self.assertFalse(cache._entry_path(old_key).exists())
+            self.assertTrue(all(cache._entry_path(k).exists() for k in keys))
+
+            # restoring an entry makes it the most recently used
+            self.assertTrue(cache.restore(keys[0], Path(temp_dir, "restored.epub")))
+            cache.prune(max_age=600, max_size=250)
+            self.assertEqual(
+                [cache._entry_path(k).exists() for k in keys],
+                [True, False, False, True],
+            )
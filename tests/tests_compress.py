@@ -0,0 +1,29 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from _compress import compress_folder, manifest_filename, min_compress_size
+
+
+class CompressTests(unittest.TestCase):
+    def test_compress_folder(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            content = b"<html>" + b"<p>newsrack</p>" * min_compress_size + b"</html>"
+            folder.joinpath("index.html").write_bytes(content)
+            folder.joinpath("small.json").write_bytes(b"{}")
+            folder.joinpath("vox.epub").write_bytes(content)
+
+            manifest = compress_folder(folder)
+            self.assertEqual(list(manifest.keys()), ["index.html"])
+            self.assertEqual(manifest["index.html"]["size"], len(content))
+            self.assertEqual(
+                gzip.decompress(folder.joinpath("index.html.gz").read_bytes()),
+                content,
+            )
+            self.assertFalse(folder.joinpath("small.json.gz").exists())
+            self.assertFalse(folder.joinpath("vox.epub.gz").exists())
+            with folder.joinpath(manifest_filename).open("r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), manifest)
@@ -0,0 +1,78 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _generate import _download_file, _next_queued_recipe
+from _recipe_utils import Recipe
+
+
+class GenerateTests(unittest.TestCase):
+    def test_next_queued_recipe(self):
+        nyt_global = Recipe(
+            recipe="nytimes-global",
+            slug="nytimes-global",
+            src_ext="mobi",
+            category="News",
+            concurrency_key="nytimes",
+        )
+        nyt_paper = Recipe(
+            recipe="nytimes-paper",
+            slug="nytimes-print",
+            src_ext="mobi",
+            category="News",
+            concurrency_key="nytimes",
+        )
+        guardian = Recipe(
+            recipe="guardian", slug="guardian", src_ext="mobi", category="News"
+        )
+        pending = [(0, nyt_global), (1, nyt_paper), (2, guardian)]
+
+        self.assertEqual(_next_queued_recipe(pending, {}, 1), (0, nyt_global))
+        # nytimes group is at its limit, so the next recipe from another group is picked
+        self.assertEqual(
+            _next_queued_recipe(pending[1:], {"nytimes": 1}, 1), (2, guardian)
+        )
+        self.assertEqual(
+            _next_queued_recipe(pending[1:], {"nytimes": 1}, 2), (1, nyt_paper)
+        )
+        self.assertIsNone(
+            _next_queued_recipe(pending[1:2], {"nytimes": 1, "guardian": 1}, 1)
+        )
+        self.assertEqual(guardian.get_concurrency_key(), "guardian")
+
+    def test_download_file(self):
+        content = b"ebook"
+        content_sha256 = hashlib.sha256(content).hexdigest()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir, "vox-2022-10-01.epub")
+            res = mock.MagicMock(status_code=200)
+            res.__enter__.return_value = res
+            res.iter_content.return_value = [content]
+            cache_sess = mock.Mock()
+            cache_sess.get.return_value = res
+
+            self.assertTrue(
+                _download_file(
+                    "https://example.com/vox-2022-10-01.epub",
+                    file_path,
+                    cache_sess,
+                    expected_size=len(content),
+                    expected_sha256=content_sha256,
+                )
+            )
+            self.assertEqual(file_path.read_bytes(), content)
+            self.assertEqual(cache_sess.get.call_count, 1)
+
+            # downloaded content does not match
+            file_path.unlink()
+            self.assertFalse(
+                _download_file(
+                    "https://example.com/vox-2022-10-01.epub",
+                    file_path,
+                    cache_sess,
+                    expected_sha256=hashlib.sha256(b"other").hexdigest(),
+                )
+            )
+            self.assertFalse(file_path.exists())
@@ -0,0 +1,75 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from _job_log import (
+    RecipeHistory,
+    RecipeRunStats,
+    load_job_log,
+    max_history,
+    max_seeded_timeout,
+    min_seeded_timeout,
+    outcome_from_status,
+    save_job_log,
+)
+from _recipe_utils import default_recipe_timeout
+
+
+class JobLogTests(unittest.TestCase):
+    def test_load_save(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job_log_path = Path(temp_dir, "job_log.json")
+            # older job logs only have the last run timestamp
+            job_log_path.write_text(json.dumps({"vox": 1700000000.5}))
+            job_log = load_job_log(job_log_path)
+            self.assertEqual(job_log["vox"].last_run, 1700000000.5)
+            self.assertEqual(job_log["vox"].runs, [])
+
+            job_log["vox"].add(
+                RecipeRunStats(
+                    started=1700000100, duration=30, outcome="Completed", size=100
+                )
+            )
+            save_job_log(job_log_path, job_log)
+            self.assertEqual(load_job_log(job_log_path), job_log)
+
+    def test_history(self):
+        history = RecipeHistory()
+        self.assertIsNone(history.expected_duration(True))
+        self.assertIsNone(history.seeded_timeout())
+
+        for i in range(max_history + 2):
+            history.add(
+                RecipeRunStats(
+                    started=i,
+                    duration=100 + i,
+                    outcome="Completed",
+                    fetch_duration=90 + i,
+                )
+            )
+        history.add(RecipeRunStats(started=99, duration=5, outcome="From cache"))
+        self.assertEqual(len(history.runs), max_history)
+        self.assertEqual(history.runs[-1].duration, 5)
+        self.assertEqual(history.expected_duration(False), 5)
+        self.assertEqual(history.expected_duration(True), 107)
+        self.assertEqual(history.seeded_timeout(), 2 * 101)
+
+        history = RecipeHistory(
+            runs=[RecipeRunStats(started=0, duration=1, outcome="", fetch_duration=1)]
+        )
+        self.assertEqual(history.expected_duration(False), 1)
+        self.assertEqual(history.seeded_timeout(), min_seeded_timeout)
+        # never shorter than the default timeout
+        self.assertEqual(min_seeded_timeout, default_recipe_timeout)
+        history.add(
+            RecipeRunStats(started=0, duration=1, outcome="", fetch_duration=3600)
+        )
+        self.assertEqual(history.seeded_timeout(), max_seeded_timeout)
+
+    def test_outcome_from_status(self):
+        self.assertEqual(
+            outcome_from_status(":white_check_mark: Completed"), "Completed"
+        )
+        self.assertEqual(outcome_from_status(":x: No output"), "No output")
+        self.assertEqual(outcome_from_status("Completed"), "Completed")
@@ -0,0 +1,53 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.joinpath("recipes", "includes")))
+
+from js_literal import parse_js_literal  # noqa: E402
+
+
+class JsLiteralTests(unittest.TestCase):
+    def test_json(self):
+        self.assertEqual(parse_js_literal('{"a": [1, "b"]};'), {"a": [1, "b"]})
+
+    def test_keys_and_strings(self):
+        self.assertEqual(
+            parse_js_literal("{a: 'it\\'s', $b: \"x\\ty\", 1: 'c\\x41\\u0042'}"),
+            {"a": "it's", "$b": "x\ty", "1": "cAB"},
+        )
+
+    def test_template_strings(self):
+        self.assertEqual(
+            parse_js_literal("{a: `one\ntwo`, b: `hi ${name}`}"),
+            {"a": "one\ntwo", "b": None},
+        )
+
+    def test_literals(self):
+        self.assertEqual(
+            parse_js_literal(
+                "[true, false, null, undefined, NaN, Infinity, -Infinity, +Infinity]"
+            ),
+            [True, False, None, None, None, None, None, None],
+        )
+
+    def test_numbers(self):
+        self.assertEqual(
+            parse_js_literal("[0x1F, 0XfF, 0o17, 0b101, -0x10, .5, -.5, 1., +1, 007]"),
+            [31, 255, 15, 5, -16, 0.5, -0.5, 1.0, 1, 7],
+        )
+        self.assertEqual(
+            parse_js_literal("[1e3, 1.5E-2, .5e1, -2.]"), [1e3, 1.5e-2, 5.0, -2.0]
+        )
+
+    def test_comments_and_trailing_commas(self):
+        self.assertEqual(
+            parse_js_literal(
+                """{
+                // line comment
+                a: [1, 2, /* block, comment */ 3,],
+                b: "//not a comment",
+            };"""
+            ),
+            {"a": [1, 2, 3], "b": "//not a comment"},
+        )
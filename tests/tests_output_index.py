@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from _output_index import OutputIndex
+
+
+class OutputIndexTests(unittest.TestCase):
+    def test_find(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            for file_name in (
+                "wsj.epub",
+                "wsj-2022-10-01.mobi",
+                "wsj-print-2022-10-01.epub",
+                "wsj-2022-10-01.jpg",
+            ):
+                folder.joinpath(file_name).touch()
+            outputs = OutputIndex(folder)
+            self.assertEqual(outputs.find("wsj", "epub"), [folder.joinpath("wsj.epub")])
+            self.assertEqual(
+                outputs.find("wsj-print", "epub"),
+                [folder.joinpath("wsj-print-2022-10-01.epub")],
+            )
+            self.assertEqual(outputs.find("wsj", "azw3"), [])
+
+            outputs.rename(
+                folder.joinpath("wsj.epub"), folder.joinpath("wsj-2022-10-01.epub")
+            )
+            self.assertEqual(
+                outputs.find("wsj", "epub"), [folder.joinpath("wsj-2022-10-01.epub")]
+            )
+
+            # written by something else
+            folder.joinpath("wsj.azw3").touch()
+            outputs.refresh(folder.joinpath("wsj.azw3"))
+            self.assertEqual(outputs.find("wsj", "azw3"), [folder.joinpath("wsj.azw3")])
+            folder.joinpath("wsj.azw3").unlink()
+            outputs.refresh(folder.joinpath("wsj.azw3"))
+            self.assertEqual(outputs.find("wsj", "azw3"), [])
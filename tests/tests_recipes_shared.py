@@ -0,0 +1,69 @@
+import logging
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.joinpath("recipes", "includes")))
+
+try:
+    import mechanize
+    from recipes_shared import BasicNewsrackRecipe  # noqa: E402
+except ImportError:  # calibre is not available
+    BasicNewsrackRecipe = None
+
+FEED_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>Article</title><link>https://example.com/article</link>
+<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(FEED_XML)))
+        self.end_headers()
+        self.wfile.write(FEED_XML)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(BasicNewsrackRecipe, "calibre is not available")
+class RecipesSharedTests(unittest.TestCase):
+    def test_fetch_feed(self):
+        class TestRecipe(BasicNewsrackRecipe):
+            timeout = 10
+            oldest_article = 365 * 100
+            max_articles_per_feed = 10
+            log = logging.getLogger(__name__)
+
+            def __init__(self):
+                self.browser = mechanize.Browser()
+                self.browser.set_handle_robots(False)
+
+            def clone_browser(self, br):
+                return br
+
+            def get_article_url(self, article):
+                return article.get("link")
+
+            def get_url_specific_delay(self, url):
+                return 0
+
+        server = HTTPServer(("127.0.0.1", 0), FeedHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/feed"
+            feed = TestRecipe()._fetch_feed(
+                "Test", url, {"127.0.0.1": threading.Semaphore(1)}
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(feed.title, "Test")
+        self.assertEqual(len(feed), 1)
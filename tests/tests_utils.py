@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from _recipe_utils import CoverOptions
+from _utils import _get_logo, generate_cover, save_cover_and_thumbnail
+
+
+class UtilsTests(unittest.TestCase):
+    def test_save_cover_and_thumbnail(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cover_path = Path(temp_dir, "cover.jpg")
+            thumbnail_path = Path(temp_dir, "cover.thumb.jpg")
+            source = BytesIO()
+            Image.new("RGB", (1600, 2400), "red").save(source, "JPEG")
+            source.seek(0)
+            save_cover_and_thumbnail(source, cover_path, thumbnail_path)
+            with Image.open(cover_path) as cover:
+                self.assertEqual(cover.size, (682, 1024))
+            with Image.open(thumbnail_path) as thumbnail:
+                self.assertEqual(thumbnail.size, (333, 500))
+
+            # smaller images are not upscaled
+            source = BytesIO()
+            Image.new("RGBA", (300, 400), "red").save(source, "PNG")
+            source.seek(0)
+            save_cover_and_thumbnail(source, cover_path, thumbnail_path)
+            with Image.open(cover_path) as cover:
+                self.assertEqual(cover.size, (300, 400))
+            with Image.open(thumbnail_path) as thumbnail:
+                self.assertEqual(thumbnail.size, (300, 400))
+
+    def test_get_logo(self):
+        logo_url = "https://example.com/logo.png"
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch(
+            "_utils.requests.get"
+        ) as mock_get:
+            logo_cache_folder = Path(temp_dir)
+            mock_get.return_value = mock.Mock(
+                status_code=200, content=b"logo", headers={"ETag": '"abc"'}
+            )
+            self.assertEqual(_get_logo(logo_url, logo_cache_folder), b"logo")
+            # only fetched once per process
+            self.assertEqual(_get_logo(logo_url, logo_cache_folder), b"logo")
+            self.assertEqual(mock_get.call_count, 1)
+
+            # next run revalidates the cached copy
+            _get_logo.cache_clear()
+            mock_get.return_value = mock.Mock(status_code=304)
+            self.assertEqual(_get_logo(logo_url, logo_cache_folder), b"logo")
+            self.assertEqual(
+                mock_get.call_args.kwargs["headers"]["If-None-Match"], '"abc"'
+            )
+            _get_logo.cache_clear()
+
+    def test_generate_cover(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            logo_path = Path(temp_dir, "logo.png")
+            Image.new("RGBA", (400, 100), "blue").save(logo_path)
+            cover_options = CoverOptions(logo_path_or_url=str(logo_path))
+            for i in range(2):
+                cover_path = Path(temp_dir, f"cover{i}.png")
+                generate_cover(cover_path, "Title", cover_options)
+                with Image.open(cover_path) as cover:
+                    self.assertEqual(
+                        cover.size,
+                        (cover_options.cover_width, cover_options.cover_height),
+                    )